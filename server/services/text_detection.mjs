@@ -11,6 +11,7 @@ import { promisify } from "util";
 import fs from "fs";
 import path from "path";
 import { fileURLToPath } from "url";
+import { createJsonLinesWorker } from "../utils/json-lines-worker.mjs";
 
 const execFileAsync = promisify(execFile);
 
@@ -22,6 +23,12 @@ const TEXT_DETECT_SCRIPT = path.join(REPO_ROOT, "tools", "text_detect.py");
 const DEBUG_TEXT_DETECT = process.env.DEBUG_TEXT_DETECT === "true" || process.env.DEBUG_TEXT_DETECT === "1";
 const PYTHON_BIN = process.env.PYTHON_BIN || "python3";
 const EAST_MODEL_PATH = process.env.EAST_MODEL_PATH || "";
+// Keep one text_detect.py --server process alive instead of spawning per image
+const TEXT_DETECT_WORKER = process.env.TEXT_DETECT_WORKER === "true" || process.env.TEXT_DETECT_WORKER === "1";
+// Per-image timeout (same as the one-shot execFile path); a hung worker is killed
+const TEXT_DETECT_TIMEOUT_MS = 30000;
+
+let textDetectWorker = null;
 
 /**
  * Extract JSON from stdout
@@ -44,6 +51,64 @@ function extractJsonFromStdout(stdout) {
   return JSON.parse(jsonLine);
 }
 
+/**
+ * Get (or start) the persistent text_detect.py --server process.
+ * Jobs are JSON lines with an id; results come back as JSON lines echoing the id.
+ * @returns {{request: (job: object) => Promise<object>, close: () => void}}
+ */
+function getTextDetectWorker() {
+  if (textDetectWorker) {
+    return textDetectWorker;
+  }
+
+  const args = [TEXT_DETECT_SCRIPT, "--server"];
+  if (EAST_MODEL_PATH && fs.existsSync(EAST_MODEL_PATH)) {
+    args.push("--east-model", EAST_MODEL_PATH);
+  }
+
+  const worker = createJsonLinesWorker({
+    command: PYTHON_BIN,
+    args,
+    errorCode: "TEXT_DETECT_WORKER_FAILED",
+    timeoutMs: TEXT_DETECT_TIMEOUT_MS,
+    logPrefix: "[TEXT_DETECT]",
+    debug: DEBUG_TEXT_DETECT,
+    onClose: () => {
+      if (textDetectWorker === worker) {
+        textDetectWorker = null;
+      }
+    }
+  });
+
+  textDetectWorker = worker;
+  return worker;
+}
+
+/**
+ * Shut down the persistent text detection worker (if running)
+ */
+export function closeTextDetectWorker() {
+  if (textDetectWorker) {
+    textDetectWorker.close();
+  }
+}
+
+/**
+ * Map text_detect.py JSON to the wrapper's result shape
+ * @param {object} result - Parsed Python result for one image
+ * @returns {{ok: boolean, textDetected: boolean, watermarkSuspected: boolean, regions: Array, suspiciousCorners: Array, detectionMethod?: string}}
+ */
+function toDetectResult(result) {
+  return {
+    ok: result.ok,
+    textDetected: result.text_detected || false,
+    watermarkSuspected: result.watermark_suspected || false,
+    regions: result.text_regions || [],
+    suspiciousCorners: result.suspicious_corners || [],
+    detectionMethod: result.detection_method
+  };
+}
+
 /**
  * Detect text in an image
  * @param {object} params
@@ -72,6 +137,30 @@ export async function detectText({ imagePath, verifyOcr = false, requestId }) {
     };
   }
 
+  if (TEXT_DETECT_WORKER) {
+    try {
+      const result = await getTextDetectWorker().request({
+        image: path.resolve(imagePath),
+        verify_ocr: verifyOcr
+      });
+
+      if (DEBUG_TEXT_DETECT) {
+        console.log(`[${requestId || "TEXT_DETECT"}] Result: textDetected=${result.text_detected}, watermark=${result.watermark_suspected}`);
+      }
+
+      return result.ok ? toDetectResult(result) : { ok: false, error: result.error, message: result.message };
+    } catch (error) {
+      // If detection fails, return "no text" to not block pipeline
+      console.warn(`[${requestId || "TEXT_DETECT"}] Detection failed: ${error.message?.substring(0, 100)}`);
+      return {
+        ok: true,
+        textDetected: false,
+        skipped: true,
+        reason: error.message || "Detection failed"
+      };
+    }
+  }
+
   const args = [
     TEXT_DETECT_SCRIPT,
     "--image", path.resolve(imagePath)
@@ -91,7 +180,7 @@ export async function detectText({ imagePath, verifyOcr = false, requestId }) {
 
   try {
     const { stdout, stderr } = await execFileAsync(PYTHON_BIN, args, {
-      timeout: 30000, // 30 second timeout
+      timeout: TEXT_DETECT_TIMEOUT_MS,
       maxBuffer: 5 * 1024 * 1024
     });
 
@@ -105,14 +194,7 @@ export async function detectText({ imagePath, verifyOcr = false, requestId }) {
       console.log(`[${requestId || "TEXT_DETECT"}] Result: textDetected=${result.text_detected}, watermark=${result.watermark_suspected}`);
     }
 
-    return {
-      ok: result.ok,
-      textDetected: result.text_detected || false,
-      watermarkSuspected: result.watermark_suspected || false,
-      regions: result.text_regions || [],
-      suspiciousCorners: result.suspicious_corners || [],
-      detectionMethod: result.detection_method
-    };
+    return toDetectResult(result);
   } catch (error) {
     // If detection fails, return "no text" to not block pipeline
     console.warn(`[${requestId || "TEXT_DETECT"}] Detection failed: ${error.message?.substring(0, 100)}`);
@@ -126,6 +208,68 @@ export async function detectText({ imagePath, verifyOcr = false, requestId }) {
   }
 }
 
+/**
+ * Detect text in several images with one Python process (one batched EAST pass)
+ * @param {object} params
+ * @param {string[]} params.imagePaths - Paths to image files
+ * @param {boolean} [params.verifyOcr=false] - Use OCR verification
+ * @param {string} [params.requestId] - Request ID for logging
+ * @returns {Promise<Array<{ok: boolean, textDetected: boolean, regions?: Array, error?: string}>>} One result per image, in order
+ */
+export async function detectTextBatch({ imagePaths, verifyOcr = false, requestId }) {
+  const skipped = (reason) => imagePaths.map(() => ({ ok: true, textDetected: false, skipped: true, reason }));
+
+  if (!fs.existsSync(TEXT_DETECT_SCRIPT)) {
+    console.warn(`[${requestId || "TEXT_DETECT"}] Script not found, skipping text detection`);
+    return skipped("Script not found");
+  }
+
+  const args = [
+    TEXT_DETECT_SCRIPT,
+    "--images", ...imagePaths.map(imagePath => path.resolve(imagePath))
+  ];
+
+  if (EAST_MODEL_PATH && fs.existsSync(EAST_MODEL_PATH)) {
+    args.push("--east-model", EAST_MODEL_PATH);
+  }
+
+  if (verifyOcr) {
+    args.push("--verify-ocr");
+  }
+
+  if (DEBUG_TEXT_DETECT) {
+    console.log(`[${requestId || "TEXT_DETECT"}] Running: ${PYTHON_BIN} ${args.join(" ")}`);
+  }
+
+  let stdout;
+  try {
+    ({ stdout } = await execFileAsync(PYTHON_BIN, args, {
+      timeout: TEXT_DETECT_TIMEOUT_MS + 10000 * imagePaths.length,
+      maxBuffer: 5 * 1024 * 1024
+    }));
+  } catch (error) {
+    // Non-zero exit when some images failed: the JSON is still on stdout
+    stdout = error.stdout;
+    if (!stdout) {
+      console.warn(`[${requestId || "TEXT_DETECT"}] Batch detection failed: ${error.message?.substring(0, 100)}`);
+      return skipped(error.message || "Detection failed");
+    }
+  }
+
+  try {
+    const result = extractJsonFromStdout(stdout);
+    if (!Array.isArray(result.results)) {
+      return skipped(result.message || "Detection failed");
+    }
+    return result.results.map(r => r.ok
+      ? toDetectResult(r)
+      : { ok: false, error: r.error, message: r.message });
+  } catch (error) {
+    console.warn(`[${requestId || "TEXT_DETECT"}] Batch detection failed: ${error.message?.substring(0, 100)}`);
+    return skipped(error.message || "Detection failed");
+  }
+}
+
 /**
  * Check image for text and decide if regeneration is needed
  * @param {object} params
@@ -6,6 +6,7 @@ import { promisify } from 'util';
 import fs from 'fs';
 import path from 'path';
 import { fileURLToPath } from 'url';
+import { createJsonLinesWorker } from '../json-lines-worker.mjs';
 
 const execFileAsync = promisify(execFile);
 
@@ -13,12 +14,19 @@ const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 const REPO_ROOT = path.resolve(__dirname, '../../../');
 const FACE_ID_SCRIPT = path.join(REPO_ROOT, 'tools', 'face_id.py');
+const FACE_WORKER_SCRIPT = path.join(REPO_ROOT, 'tools', 'face_worker.py');
 
 const DEBUG_FACE_ID = process.env.DEBUG_FACE_ID === 'true' || process.env.DEBUG_FACE_ID === '1';
 const FACE_ID_ENABLED = process.env.FACE_ID_ENABLED === 'true' || process.env.FACE_ID_ENABLED === '1';
 const FACE_ID_THRESHOLD = parseFloat(process.env.FACE_ID_THRESHOLD || '0.32');
 const FACE_ID_MAX_ATTEMPTS = parseInt(process.env.FACE_ID_MAX_ATTEMPTS || '2', 10);
 const PYTHON_BIN = process.env.PYTHON_BIN || 'python3';
+// Keep one long-lived face_worker.py process instead of spawning face_id.py per check
+const FACE_ID_WORKER = process.env.FACE_ID_WORKER === 'true' || process.env.FACE_ID_WORKER === '1';
+// Per-job timeout for the worker (includes waiting for model load); a hung worker is killed
+const FACE_WORKER_TIMEOUT_MS = parseInt(process.env.FACE_WORKER_TIMEOUT_MS || '120000', 10);
+
+let faceWorker = null;
 
 /**
  * Extract the last JSON object line from stdout, handling noisy output
@@ -54,6 +62,61 @@ export function extractJsonFromStdout(stdout) {
   }
 }
 
+/**
+ * Get (or spawn) the persistent face_worker.py process.
+ * InsightFace is loaded once by the worker; jobs are sent as JSON lines on stdin
+ * and matched to results by id.
+ * @returns {{request: (job: object) => Promise<object>, close: () => void}}
+ */
+function getFaceWorker() {
+  if (faceWorker) {
+    return faceWorker;
+  }
+
+  const worker = createJsonLinesWorker({
+    command: PYTHON_BIN,
+    args: [FACE_WORKER_SCRIPT],
+    errorCode: 'FACE_ID_PYTHON_FAILED',
+    timeoutMs: FACE_WORKER_TIMEOUT_MS,
+    logPrefix: '[FACE_ID]',
+    debug: DEBUG_FACE_ID,
+    onClose: () => {
+      if (faceWorker === worker) {
+        faceWorker = null;
+      }
+    }
+  });
+
+  faceWorker = worker;
+  return worker;
+}
+
+/**
+ * Shut down the persistent face worker (if running)
+ */
+export function closeFaceWorker() {
+  if (faceWorker) {
+    faceWorker.close();
+  }
+}
+
+/**
+ * Run a job on the persistent face worker, mapping worker failures to FACE_ID_PYTHON_FAILED
+ * @param {object} job - Worker job ({op: 'embed'|'similarity'|'composite', ...})
+ * @returns {Promise<object>} Worker result
+ */
+async function runWorkerJob(job) {
+  try {
+    return await getFaceWorker().request(job);
+  } catch (error) {
+    const pythonError = new Error(error.message.startsWith('FACE_ID_PYTHON_FAILED')
+      ? error.message
+      : `FACE_ID_PYTHON_FAILED: ${error.message}`);
+    pythonError.code = 'FACE_ID_PYTHON_FAILED';
+    throw pythonError;
+  }
+}
+
 /**
  * Check if FaceID is enabled
  */
@@ -68,7 +131,8 @@ export function getFaceIdConfig() {
   return {
     enabled: FACE_ID_ENABLED,
     threshold: FACE_ID_THRESHOLD,
-    maxAttempts: FACE_ID_MAX_ATTEMPTS
+    maxAttempts: FACE_ID_MAX_ATTEMPTS,
+    worker: FACE_ID_WORKER
   };
 }
 
@@ -76,7 +140,8 @@ export function getFaceIdConfig() {
  * Extract face embedding from reference photo and save to job folder
  * @param {string} referencePhotoPath - Path to reference photo (e.g., jobs/:bookId/hero.jpg)
  * @param {string} outputJsonPath - Path to save embedding JSON (e.g., jobs/:bookId/face_ref.json)
- * @returns {Promise<{ok: boolean, embedding?: number[], embedding_dim?: number, error?: string}>}
+ * The raw float32 embedding is written to face_ref.npy next to the JSON (the JSON only holds embedding_path)
+ * @returns {Promise<{ok: boolean, embedding_path?: string, embedding_dim?: number, error?: string}>}
  */
 export async function extractReferenceEmbedding(referencePhotoPath, outputJsonPath) {
   if (!FACE_ID_ENABLED) {
@@ -184,6 +249,16 @@ export async function checkSimilarity(referencePhotoPath, candidateImagePath) {
     console.log(`[FACE_ID] Checking similarity: ref=${absRefPath}, candidate=${absCandidatePath}`);
   }
 
+  if (FACE_ID_WORKER) {
+    const result = await runWorkerJob({ op: 'similarity', reference: absRefPath, candidate: absCandidatePath });
+
+    if (DEBUG_FACE_ID) {
+      console.log(`[FACE_ID] Similarity result (worker): ok=${result.ok}, similarity=${result.similarity}, passed=${result.similarity >= FACE_ID_THRESHOLD}`);
+    }
+
+    return result;
+  }
+
   try {
     const { stdout, stderr } = await execFileAsync(PYTHON_BIN, [
       FACE_ID_SCRIPT,
@@ -255,9 +330,12 @@ export async function validateFaceDetected(photoPath) {
     const tempJsonPath = path.join(path.dirname(photoPath), '.face_check_temp.json');
     const result = await extractReferenceEmbedding(photoPath, tempJsonPath);
     
-    // Clean up temp file
-    if (fs.existsSync(tempJsonPath)) {
-      fs.unlinkSync(tempJsonPath);
+    // Clean up temp files (JSON + raw .npy embedding written next to it)
+    const tempNpyPath = tempJsonPath.replace(/\.json$/, '.npy');
+    for (const tempPath of [tempJsonPath, tempNpyPath]) {
+      if (fs.existsSync(tempPath)) {
+        fs.unlinkSync(tempPath);
+      }
     }
 
     // JSON parsed successfully - check face_detected field
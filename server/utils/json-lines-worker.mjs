@@ -0,0 +1,161 @@
+// Client for long-lived Python worker processes (tools/face_worker.py,
+// tools/text_detect.py --server) that speak JSON lines on stdin/stdout
+
+import { spawn } from 'child_process';
+import readline from 'readline';
+
+/**
+ * Spawn a JSON-lines worker and return a client for it.
+ *
+ * Protocol: the worker prints {"ok": true, "ready": true} once initialized, then
+ * answers each job line ({...job, id}) with one result line echoing the id.
+ * An id-less {"ok": false, ...} line before ready is a startup failure (e.g.
+ * DEPENDENCIES_MISSING); after ready it is logged and ignored.
+ *
+ * The worker only keeps the event loop alive while jobs are pending, so one-shot
+ * scripts exit when done even if they never call close().
+ *
+ * @param {object} options
+ * @param {string} options.command - Executable (e.g. PYTHON_BIN)
+ * @param {string[]} options.args - Arguments (script path and flags)
+ * @param {string} options.errorCode - Prefix for rejection messages (e.g. 'FACE_ID_PYTHON_FAILED')
+ * @param {number} options.timeoutMs - Per-job timeout (includes waiting for ready); a hung worker is killed
+ * @param {string} [options.logPrefix] - Prefix for debug logs (e.g. '[FACE_ID]')
+ * @param {boolean} [options.debug] - Log worker stderr and ignored messages
+ * @param {() => void} [options.onClose] - Called once the worker is closed or has failed
+ * @returns {{request: (job: object) => Promise<object>, close: () => void}}
+ */
+export function createJsonLinesWorker({ command, args, errorCode, timeoutMs, logPrefix = '[WORKER]', debug = false, onClose = () => {} }) {
+  if (debug) {
+    console.log(`${logPrefix} Starting worker: ${command} ${args.join(' ')}`);
+  }
+
+  const child = spawn(command, args, { stdio: ['pipe', 'pipe', 'pipe'] });
+  const pending = new Map();
+  let nextId = 1;
+  let isReady = false;
+  let closed = false;
+  let readyResolve;
+  let readyReject;
+  const ready = new Promise((resolve, reject) => {
+    readyResolve = resolve;
+    readyReject = reject;
+  });
+  // Avoid unhandled rejection if the worker dies before anyone awaits it
+  ready.catch(() => {});
+
+  // Hold the event loop only while a job is in flight (process handle + stdio pipes)
+  const updateRef = () => {
+    const method = pending.size > 0 ? 'ref' : 'unref';
+    for (const handle of [child, child.stdin, child.stdout, child.stderr]) {
+      handle[method]();
+    }
+  };
+  updateRef();
+
+  const markClosed = () => {
+    if (!closed) {
+      closed = true;
+      onClose();
+    }
+  };
+
+  const fail = (error) => {
+    markClosed();
+    if (child.exitCode === null && child.signalCode === null) {
+      child.kill();
+    }
+    readyReject(error);
+    for (const { reject } of pending.values()) {
+      reject(error);
+    }
+    pending.clear();
+    updateRef();
+  };
+
+  const rl = readline.createInterface({ input: child.stdout });
+  rl.on('line', (line) => {
+    const trimmed = line.trim();
+    if (!trimmed.startsWith('{') || !trimmed.endsWith('}')) {
+      return;
+    }
+
+    let message;
+    try {
+      message = JSON.parse(trimmed);
+    } catch {
+      return;
+    }
+
+    if (message.ready) {
+      isReady = true;
+      readyResolve();
+      return;
+    }
+
+    if (message.id !== undefined && pending.has(message.id)) {
+      const { resolve } = pending.get(message.id);
+      pending.delete(message.id);
+      updateRef();
+      delete message.id;
+      resolve(message);
+      return;
+    }
+
+    if (message.ok === false) {
+      if (!isReady) {
+        fail(new Error(`${errorCode}: ${message.error}: ${message.message}`));
+      } else if (debug) {
+        console.warn(`${logPrefix} Worker error without job id: ${message.error}: ${message.message}`);
+      }
+    }
+  });
+
+  child.stderr.on('data', (chunk) => {
+    if (debug) {
+      console.warn(`${logPrefix} Worker stderr: ${chunk.toString().trim().substring(0, 300)}`);
+    }
+  });
+
+  child.on('error', (error) => {
+    fail(new Error(`${errorCode}: Failed to start worker: ${error.message}`));
+  });
+
+  // EPIPE when the worker dies mid-write must not become an uncaught exception
+  child.stdin.on('error', (error) => {
+    fail(new Error(`${errorCode}: Worker stdin error: ${error.message}`));
+  });
+
+  child.on('exit', (code) => {
+    fail(new Error(`${errorCode}: Worker exited with code ${code}`));
+  });
+
+  return {
+    request(job) {
+      const id = nextId++;
+      return new Promise((resolve, reject) => {
+        if (closed) {
+          reject(new Error(`${errorCode}: Worker is closed`));
+          return;
+        }
+        const timer = setTimeout(() => {
+          fail(new Error(`${errorCode}: Worker job timed out after ${timeoutMs}ms`));
+        }, timeoutMs);
+        pending.set(id, {
+          resolve: (value) => { clearTimeout(timer); resolve(value); },
+          reject: (error) => { clearTimeout(timer); reject(error); }
+        });
+        updateRef();
+        ready.then(() => {
+          if (pending.has(id)) {
+            child.stdin.write(JSON.stringify({ ...job, id }) + '\n');
+          }
+        }, () => {});
+      });
+    },
+    close() {
+      markClosed();
+      child.stdin.end();
+    }
+  };
+}
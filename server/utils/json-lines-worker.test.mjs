@@ -0,0 +1,114 @@
+import assert from 'assert';
+import { execFile } from 'child_process';
+import { promisify } from 'util';
+import { createJsonLinesWorker } from './json-lines-worker.mjs';
+
+const execFileAsync = promisify(execFile);
+const MODULE_URL = new URL('./json-lines-worker.mjs', import.meta.url).href;
+
+// Fake worker: a node script speaking the same protocol as face_worker.py /
+// text_detect.py --server. MODE picks the misbehavior under test.
+const FAKE_WORKER = `
+const mode = process.argv[1];
+const write = (obj) => process.stdout.write(JSON.stringify(obj) + '\\n');
+if (mode === 'deps-missing') {
+  write({ ok: false, error: 'DEPENDENCIES_MISSING', message: 'no cv2' });
+  process.exit(1);
+}
+console.log('loading models...');
+write({ ok: true, ready: true });
+let buffer = '';
+const held = [];
+process.stdin.on('data', (chunk) => {
+  buffer += chunk;
+  let nl;
+  while ((nl = buffer.indexOf('\\n')) >= 0) {
+    const job = JSON.parse(buffer.slice(0, nl));
+    buffer = buffer.slice(nl + 1);
+    if (mode === 'hang') continue;
+    if (mode === 'die') process.exit(3);
+    if (mode === 'noise') write({ ok: false, error: 'INVALID_JOB', message: 'stray line' });
+    if (mode === 'reorder') {
+      held.push(job);
+      if (held.length === 2) held.reverse().forEach((j) => write({ ok: true, echo: j.value, id: j.id }));
+      continue;
+    }
+    write({ ok: true, echo: job.value, id: job.id });
+  }
+});
+`;
+
+function fakeWorker(mode, options = {}) {
+  return createJsonLinesWorker({
+    command: process.execPath,
+    args: ['-e', FAKE_WORKER, mode],
+    errorCode: 'TEST_WORKER_FAILED',
+    timeoutMs: 2000,
+    ...options
+  });
+}
+
+async function testResultsMatchedById() {
+  const worker = fakeWorker('reorder');
+  const [a, b] = await Promise.all([worker.request({ value: 'a' }), worker.request({ value: 'b' })]);
+  assert.deepStrictEqual(a, { ok: true, echo: 'a' });
+  assert.deepStrictEqual(b, { ok: true, echo: 'b' });
+  worker.close();
+}
+
+async function testStartupFailureRejects() {
+  let closed = 0;
+  const worker = fakeWorker('deps-missing', { onClose: () => { closed++; } });
+  await assert.rejects(worker.request({ value: 'a' }), /TEST_WORKER_FAILED: DEPENDENCIES_MISSING: no cv2/);
+  assert.strictEqual(closed, 1);
+}
+
+async function testIdlessErrorAfterReadyIgnored() {
+  const worker = fakeWorker('noise');
+  assert.deepStrictEqual(await worker.request({ value: 'a' }), { ok: true, echo: 'a' });
+  assert.deepStrictEqual(await worker.request({ value: 'b' }), { ok: true, echo: 'b' });
+  worker.close();
+}
+
+async function testWorkerExitRejectsPending() {
+  let closed = 0;
+  const worker = fakeWorker('die', { onClose: () => { closed++; } });
+  await assert.rejects(worker.request({ value: 'a' }), /TEST_WORKER_FAILED: Worker (exited with code 3|stdin error)/);
+  assert.strictEqual(closed, 1);
+  await assert.rejects(worker.request({ value: 'b' }), /TEST_WORKER_FAILED: Worker is closed/);
+}
+
+async function testTimeoutRejectsAndKills() {
+  const worker = fakeWorker('hang', { timeoutMs: 300 });
+  const started = Date.now();
+  await assert.rejects(worker.request({ value: 'a' }), /TEST_WORKER_FAILED: Worker job timed out after 300ms/);
+  assert.ok(Date.now() - started < 2000);
+}
+
+async function testIdleWorkerDoesNotKeepProcessAlive() {
+  // One-shot script that never calls close(): must still exit once its job is done
+  const script = `
+    import { createJsonLinesWorker } from ${JSON.stringify(MODULE_URL)};
+    const worker = createJsonLinesWorker({
+      command: process.execPath,
+      args: ['-e', ${JSON.stringify(FAKE_WORKER)}, 'echo'],
+      errorCode: 'TEST_WORKER_FAILED',
+      timeoutMs: 2000
+    });
+    const result = await worker.request({ value: 'a' });
+    console.log(JSON.stringify(result));
+  `;
+  const { stdout } = await execFileAsync(process.execPath, ['--input-type=module', '-e', script], { timeout: 5000 });
+  assert.deepStrictEqual(JSON.parse(stdout.trim()), { ok: true, echo: 'a' });
+}
+
+console.log('Running json-lines worker client tests...');
+
+await testResultsMatchedById();
+await testStartupFailureRejects();
+await testIdlessErrorAfterReadyIgnored();
+await testWorkerExitRejectsPending();
+await testTimeoutRejectsAndKills();
+await testIdleWorkerDoesNotKeepProcessAlive();
+
+console.log('✅ All json-lines worker client tests passed');
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Face Batch Tool - composite hero_head onto every page of a book in parallel
+
+Runs face_composite.composite_face for all pages on a pool of K worker
+processes. Each worker initializes InsightFace once (single-threaded ONNX
+Runtime to avoid oversubscription) and then serves its share of the pages.
+
+Output: JSON with one composite result per page (in input order)
+"""
+
+import sys
+import json
+import argparse
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+warnings.filterwarnings("ignore")
+
+import face_service
+import face_composite
+
+
+def _init_face_app():
+    """Pool initializer: warm a single-threaded InsightFace instance per process"""
+    face_service.FACE_ORT_THREADS = 1
+    if face_service.DEPENDENCIES_AVAILABLE:
+        face_composite.cv2.setNumThreads(1)
+    face_service.get_face_app()
+
+
+def _composite_one(hero_head, page_image, output, include_hair, blend_mode, intermediate_format):
+    """Composite one page (runs inside a pool worker)"""
+    output_dir = os.path.dirname(output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    try:
+        return face_composite.composite_face(
+            hero_head,
+            page_image,
+            output,
+            include_hair=include_hair,
+            blend_mode=blend_mode,
+            intermediate_format=intermediate_format
+        )
+    except Exception as e:
+        return {
+            "ok": False,
+            "error": "COMPOSITE_FAILED",
+            "message": str(e)
+        }
+
+
+def composite_pages(hero_head, page_images, outputs, include_hair=True, blend_mode="multiband", workers=None,
+                    intermediate_format="image"):
+    """
+    Composite hero_head onto each page on a process pool.
+    Returns: list of composite_face result dicts, in page order
+    """
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 2) // 2)
+    workers = max(1, min(workers, len(page_images)))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_face_app) as pool:
+        futures = [
+            pool.submit(_composite_one, hero_head, page_image, output, include_hair, blend_mode, intermediate_format)
+            for page_image, output in zip(page_images, outputs)
+        ]
+        return [future.result() for future in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel face compositing for all pages of a book')
+    parser.add_argument('--hero-head', type=str, required=True, help='Path to hero_head image (source)')
+    parser.add_argument('--page-images', type=str, nargs='+', required=True, help='Paths to page images (targets)')
+    parser.add_argument('--outputs', type=str, nargs='+', required=True, help='Output paths, one per page image')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count / 2)')
+    parser.add_argument('--no-hair', action='store_true', help='Face only, no hair extension')
+    parser.add_argument('--blend', type=str, choices=['multiband', 'poisson'], default='multiband',
+                        help='Blend method: multiband (fast, default) or poisson (seamlessClone, high quality)')
+    parser.add_argument('--intermediate-format', type=str, choices=['image', 'raw'], default='image',
+                        help='Output format: image (encode by extension, default) or raw (BGR .npy)')
+
+    args = parser.parse_args()
+
+    if not face_service.DEPENDENCIES_AVAILABLE or not face_service.INSIGHTFACE_AVAILABLE:
+        result = {
+            "ok": False,
+            "error": "DEPENDENCIES_MISSING",
+            "message": f"Required packages not installed: {face_service.IMPORT_ERROR}",
+            "required_packages": ["opencv-python", "numpy", "insightface"]
+        }
+        print(json.dumps(result, ensure_ascii=False))
+        sys.exit(1)
+
+    if len(args.page_images) != len(args.outputs):
+        result = {
+            "ok": False,
+            "error": "MISSING_ARGS",
+            "message": "--page-images and --outputs must have the same length"
+        }
+        print(json.dumps(result, ensure_ascii=False))
+        sys.exit(1)
+
+    if not os.path.exists(args.hero_head):
+        result = {
+            "ok": False,
+            "error": "HERO_HEAD_NOT_FOUND",
+            "message": f"Hero head not found: {args.hero_head}"
+        }
+        print(json.dumps(result, ensure_ascii=False))
+        sys.exit(1)
+
+    results = composite_pages(
+        args.hero_head,
+        args.page_images,
+        args.outputs,
+        include_hair=not args.no_hair,
+        blend_mode=args.blend,
+        workers=args.workers,
+        intermediate_format=args.intermediate_format
+    )
+
+    result = {
+        "ok": all(r.get("ok") for r in results),
+        "results": results
+    }
+
+    print(json.dumps(result, ensure_ascii=False))
+    sys.exit(0 if result["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 Face Compositing Tool - Deterministic face replacement using landmark alignment
 
 This script replaces the face in a generated page image with the hero_head face
-using landmark-based alignment and Poisson blending (seamlessClone).
+using landmark-based alignment and multi-band (Laplacian pyramid) blending.
 
 Workflow:
 1. Detect face landmarks in both images (hero_head = source, page = target)
@@ -11,7 +11,8 @@ Workflow:
 3. Warp hero_head to match page face position/scale/rotation
 4. Create soft elliptical mask for face region
 5. Color match hero to page lighting
-6. Blend using OpenCV seamlessClone (Poisson blending)
+6. Blend using multi-band (Laplacian pyramid) blending
+   (OpenCV seamlessClone / Poisson blending is available as opt-in high-quality mode)
 
 Output: JSON with result info, composited image saved to output path
 """
@@ -20,73 +21,40 @@ import sys
 import json
 import argparse
 import os
+import tempfile
 import warnings
 from pathlib import Path
 
 # Suppress warnings to reduce noise
 warnings.filterwarnings("ignore")
 
+import face_service
+from face_service import get_face_app, detect, detect_batch, load_face_data, save_face_data, INSIGHTFACE_AVAILABLE
+
 # Check dependencies
-DEPENDENCIES_AVAILABLE = True
-IMPORT_ERROR = None
+DEPENDENCIES_AVAILABLE = face_service.DEPENDENCIES_AVAILABLE
+IMPORT_ERROR = face_service.IMPORT_ERROR
 
-try:
+if DEPENDENCIES_AVAILABLE:
     import cv2
     import numpy as np
-except ImportError as e:
-    DEPENDENCIES_AVAILABLE = False
-    IMPORT_ERROR = f"OpenCV/NumPy: {str(e)}"
-
-try:
-    from insightface import app as insightface_app
-    INSIGHTFACE_AVAILABLE = True
-except ImportError:
-    INSIGHTFACE_AVAILABLE = False
-
-# Global face detector (lazy init)
-_face_app = None
-
-def get_face_app():
-    """Get or initialize InsightFace detector"""
-    global _face_app
-    if _face_app is None and INSIGHTFACE_AVAILABLE:
-        try:
-            _face_app = insightface_app.FaceAnalysis(providers=['CPUExecutionProvider'])
-            _face_app.prepare(ctx_id=-1, det_size=(640, 640))
-        except Exception as e:
-            print(f"Warning: Failed to init InsightFace: {e}", file=sys.stderr)
-            return None
-    return _face_app
 
 
-def detect_face_landmarks(image, face_app):
+def read_image_reduced(path, full_shape=None):
     """
-    Detect face and extract 5-point landmarks using InsightFace
-    Returns: (landmarks_5pt, bbox, face_detected)
-    landmarks_5pt: [left_eye, right_eye, nose, left_mouth, right_mouth]
+    Read an image, decoding JPEGs at half resolution when large enough.
+    full_shape: Optional known full-resolution (h, w); picks the decode mode up front
+    instead of trial-decoding at half size first
+    Returns: (image, scale) where scale maps image coords back to full resolution
     """
-    if face_app is None:
-        return None, None, False
-    
-    try:
-        faces = face_app.get(image)
-        if faces is None or len(faces) == 0:
-            return None, None, False
-        
-        # Get the largest face (by bbox area)
-        best_face = max(faces, key=lambda f: (f.bbox[2] - f.bbox[0]) * (f.bbox[3] - f.bbox[1]))
-        
-        # InsightFace provides kps (5 keypoints)
-        if best_face.kps is None:
-            return None, None, False
-        
-        landmarks_5pt = best_face.kps.astype(np.float32)
-        bbox = best_face.bbox.astype(np.float32)
-        
-        return landmarks_5pt, bbox, True
-    except Exception as e:
-        print(f"Face detection error: {e}", file=sys.stderr)
-        return None, None, False
+    if os.path.splitext(path)[1].lower() in JPEG_SUFFIXES:
+        if full_shape is None:
+            image = cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_2)
+            if image is not None and min(image.shape[:2]) >= REDUCED_MIN_SIZE:
+                return image, 2.0
+        elif (min(full_shape[:2]) + 1) // 2 >= REDUCED_MIN_SIZE:
+            return cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_2), 2.0
+    return cv2.imread(path), 1.0
 
 
 def select_main_face(faces, image_shape):
@@ -96,7 +64,7 @@ def select_main_face(faces, image_shape):
     1. Largest face by area
     2. If tied, prefer face closest to center
     """
-    if not faces or len(faces) == 0:
+    if not faces:
         return None
     
     if len(faces) == 1:
@@ -116,6 +84,57 @@ def select_main_face(faces, image_shape):
     return max(faces, key=score_face)
 
 
+def detect_best(image, faces=None):
+    """
+    Detect faces and pick the main one (same heuristic for hero and page)
+    faces: Optional precomputed detections for image (e.g. from detect_batch)
+    Returns: (landmarks_5pt, bbox), or (None, None) if no usable face
+    landmarks_5pt: [left_eye, right_eye, nose, left_mouth, right_mouth]
+    """
+    if faces is None:
+        faces = detect(image, with_embedding=False)
+    
+    face = select_main_face(faces, image.shape)
+    if face is None or face.kps is None:
+        return None, None
+    
+    return face.kps.astype(np.float32), face.bbox.astype(np.float32)
+
+
+def similarity_from_points(src, dst):
+    """
+    Closed-form least-squares similarity transform (Umeyama) mapping src points to dst.
+    Returns: 2x3 float32 matrix, or None for degenerate input
+    """
+    src = src.astype(np.float64)
+    dst = dst.astype(np.float64)
+    
+    src_mean = src.mean(axis=0)
+    dst_mean = dst.mean(axis=0)
+    src_c = src - src_mean
+    dst_c = dst - dst_mean
+    
+    src_var = np.sum(src_c ** 2)
+    if src_var < 1e-9:
+        return None
+    
+    try:
+        U, S, Vt = np.linalg.svd(dst_c.T @ src_c)
+    except np.linalg.LinAlgError:
+        return None
+    
+    # Guard against reflections
+    d = np.ones(2)
+    if np.linalg.det(U) * np.linalg.det(Vt) < 0:
+        d[1] = -1
+    
+    R = U @ np.diag(d) @ Vt
+    scale = np.sum(S * d) / src_var
+    t = dst_mean - scale * R @ src_mean
+    
+    return np.hstack([scale * R, t[:, None]]).astype(np.float32)
+
+
 def compute_similarity_transform(src_pts, dst_pts):
     """
     Compute similarity transform (scale, rotation, translation) from src to dst.
@@ -125,8 +144,11 @@ def compute_similarity_transform(src_pts, dst_pts):
     src = src_pts[:3].astype(np.float32)
     dst = dst_pts[:3].astype(np.float32)
     
-    # Estimate affine transform
-    transform, _ = cv2.estimateAffinePartial2D(src, dst)
+    # Closed-form solve; RANSAC estimation only as fallback
+    transform = similarity_from_points(src, dst)
+    
+    if transform is None:
+        transform, _ = cv2.estimateAffinePartial2D(src, dst)
     
     if transform is None:
         # Fallback: use all 5 points
@@ -135,14 +157,151 @@ def compute_similarity_transform(src_pts, dst_pts):
     return transform
 
 
-def create_face_mask(image_shape, landmarks, bbox, expansion=1.3):
+# Extra context kept around the mask ROI for the blend's low-frequency bands
+BLEND_MARGIN = 32
+
+# Multi-band blend pyramid depth; the coarse bands spread the mask over ~2**(levels + 1)
+# pixels, so the ROI margin grows with it to keep the paste-back edge seamless
+BLEND_LEVELS = 5
+
+# JPEGs are decoded at half resolution (libjpeg DCT scaling) unless that gets this small
+JPEG_SUFFIXES = ('.jpg', '.jpeg')
+REDUCED_MIN_SIZE = 512
+
+# Output encoding: baseline JPEG without Huffman table optimization (~2x faster encode)
+JPEG_QUALITY = 88
+
+# Raw BGR intermediates (np.save) for pipeline stages that re-read the page
+RAW_SUFFIX = '.npy'
+
+# Soft mask templates keyed by (quantized axes, box size): pages of a book share
+# resolution and face size, so later pages only paste the cached template
+MASK_AXIS_STEP = 4
+MASK_TEMPLATE_CACHE_SIZE = 32
+_mask_templates = {}
+
+# Per-process scratch buffers, reallocated only when the ROI shape changes
+_scratch_buffers = {}
+
+
+def scratch_buffer(name, shape, dtype=None):
+    """Get a reusable scratch array (contents undefined) for the given shape"""
+    dtype = np.dtype(dtype or np.uint8)
+    buf = _scratch_buffers.get(name)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = np.empty(shape, dtype=dtype)
+        _scratch_buffers[name] = buf
+    return buf
+
+
+def read_page(path):
     """
-    Create soft elliptical mask covering face region.
-    expansion: How much to expand the mask beyond detected bbox (1.0 = exact, 1.3 = 30% larger)
+    Read a page image. Raw .npy intermediates are memory-mapped copy-on-write,
+    so only the pasted ROI is ever copied.
+    """
+    if path.endswith(RAW_SUFFIX):
+        try:
+            return np.load(path, mmap_mode='c')
+        except (OSError, ValueError):
+            return None
+    return cv2.imread(path)
+
+
+def write_output(path, image, intermediate_format="image"):
+    """
+    Write the composited page.
+    intermediate_format: "image" encodes by extension, "raw" writes BGR with np.save
+    Returns: path actually written
+    """
+    if intermediate_format == "raw":
+        if not path.endswith(RAW_SUFFIX):
+            path = os.path.splitext(path)[0] + RAW_SUFFIX
+        # The page may be a memory map of this very file (in-place composite):
+        # write a temp file next to it and rename, never truncate the mapped file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=RAW_SUFFIX + ".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, image)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return path
+    
+    params = []
+    if os.path.splitext(path)[1].lower() in JPEG_SUFFIXES:
+        params = [
+            cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY,
+            cv2.IMWRITE_JPEG_PROGRESSIVE, 0,
+            cv2.IMWRITE_JPEG_OPTIMIZE, 0
+        ]
+    cv2.imwrite(path, image, params)
+    return path
+
+
+def expand_roi(roi, image_shape, margin):
+    """Grow an (x1, y1, x2, y2) box by margin on every side, clipped to the image"""
+    h, w = image_shape[:2]
+    x1, y1, x2, y2 = roi
+    return max(x1 - margin, 0), max(y1 - margin, 0), min(x2 + margin, w), min(y2 + margin, h)
+
+
+def quantize_axes(axes):
+    """Round ellipse semi-axes to MASK_AXIS_STEP so similar face sizes share a template"""
+    return tuple(max(MASK_AXIS_STEP, int(round(a / MASK_AXIS_STEP)) * MASK_AXIS_STEP) for a in axes)
+
+
+def mask_template(axes, box_size, passes=3):
+    """
+    Filled ellipse softened with repeated box filters (Gaussian approximation),
+    centered on a canvas just large enough for the blur. Cached per (axes, box_size).
+    Returns: template of shape (2 * (axes[1] + pad) + 1, 2 * (axes[0] + pad) + 1)
+    """
+    key = (axes, box_size, passes)
+    template = _mask_templates.pop(key, None)
+    if template is None:
+        pad = passes * (box_size // 2) + 1
+        template = np.zeros((2 * (axes[1] + pad) + 1, 2 * (axes[0] + pad) + 1), dtype=np.uint8)
+        cv2.ellipse(template, (axes[0] + pad, axes[1] + pad), axes, 0, 0, 360, 255, -1)
+        for _ in range(passes):
+            template = cv2.boxFilter(template, -1, (box_size, box_size))
+        if len(_mask_templates) >= MASK_TEMPLATE_CACHE_SIZE:
+            _mask_templates.pop(next(iter(_mask_templates)))
+    
+    # Re-insert so the dict stays ordered least -> most recently used
+    _mask_templates[key] = template
+    return template
+
+
+def place_mask(image_shape, center, axes, box_size):
+    """
+    Full-size mask with the cached soft ellipse template slice-assigned at center.
+    Returns: (mask, roi) where roi = (x1, y1, x2, y2) bounds every non-zero mask pixel
     """
     h, w = image_shape[:2]
     mask = np.zeros((h, w), dtype=np.uint8)
     
+    template = mask_template(quantize_axes(axes), box_size)
+    th, tw = template.shape
+    ox = center[0] - tw // 2
+    oy = center[1] - th // 2
+    x1, y1 = max(ox, 0), max(oy, 0)
+    x2, y2 = min(ox + tw, w), min(oy + th, h)
+    if x1 < x2 and y1 < y2:
+        mask[y1:y2, x1:x2] = template[y1 - oy:y2 - oy, x1 - ox:x2 - ox]
+    
+    return mask, (x1, y1, x2, y2)
+
+
+def create_face_mask(image_shape, landmarks, bbox, expansion=1.3, return_roi=False):
+    """
+    Create soft elliptical mask covering face region.
+    expansion: How much to expand the mask beyond detected bbox (1.0 = exact, 1.3 = 30% larger)
+    return_roi: If True, return (mask, roi) with roi = (x1, y1, x2, y2) of the non-zero area
+    """
     # Calculate face center and size from bbox
     x1, y1, x2, y2 = bbox
     face_w = (x2 - x1) * expansion
@@ -150,24 +309,21 @@ def create_face_mask(image_shape, landmarks, bbox, expansion=1.3):
     center_x = int((x1 + x2) / 2)
     center_y = int((y1 + y2) / 2 - face_h * 0.05)  # Shift up slightly
     
-    # Draw filled ellipse
+    # Filled ellipse, soft edges: 3x box 17x17 ~ GaussianBlur((31, 31), 15)
     axes = (int(face_w / 2), int(face_h / 2))
-    cv2.ellipse(mask, (center_x, center_y), axes, 0, 0, 360, 255, -1)
-    
-    # Gaussian blur for soft edges
-    mask = cv2.GaussianBlur(mask, (31, 31), 15)
+    mask, roi = place_mask(image_shape, (center_x, center_y), axes, 17)
     
+    if return_roi:
+        return mask, roi
     return mask
 
 
-def create_hair_extended_mask(image_shape, landmarks, bbox, expansion=1.4):
+def create_hair_extended_mask(image_shape, landmarks, bbox, expansion=1.4, return_roi=False):
     """
     Create mask that includes face and extends upward for hair.
     Better for hero_head which includes hair.
+    return_roi: If True, return (mask, roi) with roi = (x1, y1, x2, y2) of the non-zero area
     """
-    h, w = image_shape[:2]
-    mask = np.zeros((h, w), dtype=np.uint8)
-    
     # Calculate face region from bbox
     x1, y1, x2, y2 = bbox
     face_w = (x2 - x1) * expansion
@@ -181,11 +337,11 @@ def create_hair_extended_mask(image_shape, landmarks, bbox, expansion=1.4):
     hair_extension = 1.5  # 50% taller to include hair
     axes = (int(face_w / 2), int(face_h * hair_extension / 2))
     
-    cv2.ellipse(mask, (center_x, center_y), axes, 0, 0, 360, 255, -1)
-    
-    # Gaussian blur for soft edges
-    mask = cv2.GaussianBlur(mask, (41, 41), 20)
+    # Filled ellipse, soft edges: 3x box 21x21 ~ GaussianBlur((41, 41), 20)
+    mask, roi = place_mask(image_shape, (center_x, center_y), axes, 21)
     
+    if return_roi:
+        return mask, roi
     return mask
 
 
@@ -193,60 +349,110 @@ def color_match_lab(source, target, mask):
     """
     Match source image colors to target using LAB color space mean/std transfer.
     Only considers pixels within mask region.
+    The per-channel affine transfer is applied to the uint8 LAB image via a lookup table.
     """
-    # Convert to LAB
-    source_lab = cv2.cvtColor(source, cv2.COLOR_BGR2LAB).astype(np.float32)
-    target_lab = cv2.cvtColor(target, cv2.COLOR_BGR2LAB).astype(np.float32)
-    
-    # Get mask as boolean
-    mask_bool = mask > 128
-    
-    # Calculate stats for each channel
-    result_lab = source_lab.copy()
-    
-    for c in range(3):
-        src_channel = source_lab[:, :, c]
-        tgt_channel = target_lab[:, :, c]
-        
-        # Get stats from masked regions
-        src_mean = np.mean(src_channel[mask_bool]) if np.any(mask_bool) else np.mean(src_channel)
-        src_std = np.std(src_channel[mask_bool]) if np.any(mask_bool) else np.std(src_channel)
-        tgt_mean = np.mean(tgt_channel[mask_bool]) if np.any(mask_bool) else np.mean(tgt_channel)
-        tgt_std = np.std(tgt_channel[mask_bool]) if np.any(mask_bool) else np.std(tgt_channel)
-        
-        # Avoid division by zero
-        if src_std < 1:
-            src_std = 1
-        
-        # Transfer: normalize to target distribution
-        result_lab[:, :, c] = (src_channel - src_mean) * (tgt_std / src_std) + tgt_mean
-    
-    # Clip to valid range and convert back
-    result_lab = np.clip(result_lab, 0, 255).astype(np.uint8)
+    # Convert to LAB (uint8) into reusable buffers
+    source_lab = cv2.cvtColor(source, cv2.COLOR_BGR2LAB, dst=scratch_buffer("source_lab", source.shape))
+    target_lab = cv2.cvtColor(target, cv2.COLOR_BGR2LAB, dst=scratch_buffer("target_lab", target.shape))
+    
+    # Masked pixel indices (computed once); use whole image if mask is empty
+    idx = np.flatnonzero(mask.ravel() > 128)
+    src_pixels = source_lab.reshape(-1, 3)
+    tgt_pixels = target_lab.reshape(-1, 3)
+    if idx.size > 0:
+        src_pixels = src_pixels[idx]
+        tgt_pixels = tgt_pixels[idx]
+    
+    # Per-channel stats as (3,) vectors in one pass
+    src_mean = src_pixels.mean(axis=0, dtype=np.float64)
+    src_std = src_pixels.std(axis=0, dtype=np.float64)
+    tgt_mean = tgt_pixels.mean(axis=0, dtype=np.float64)
+    tgt_std = tgt_pixels.std(axis=0, dtype=np.float64)
+    
+    # Avoid division by zero
+    src_std = np.maximum(src_std, 1)
+    
+    # Transfer y = (x - src_mean) * scale + tgt_mean, tabulated for every uint8 x
+    scale = (tgt_std / src_std).astype(np.float32)
+    levels = np.arange(256, dtype=np.float32)[:, None]
+    lut = (levels - src_mean.astype(np.float32)) * scale + tgt_mean.astype(np.float32)
+    lut = np.clip(lut, 0, 255).astype(np.uint8).reshape(256, 1, 3)
+    
+    # Apply per-channel LUT and convert back
+    result_lab = cv2.LUT(source_lab, lut, dst=scratch_buffer("result_lab", source.shape))
     result = cv2.cvtColor(result_lab, cv2.COLOR_LAB2BGR)
     
     return result
 
 
-def seamless_clone_safe(src, dst, mask, center):
+def multiband_blend(src, dst, mask, levels=BLEND_LEVELS):
     """
-    Perform seamless clone with fallback to alpha blending if it fails.
+    Blend src into dst with a multi-band (Laplacian pyramid) blend.
+    mask: uint8 single-channel, 255 = take src, 0 = keep dst
+    Images are padded to a multiple of 2**levels and cropped back afterwards.
     """
+    h, w = dst.shape[:2]
+    step = 2 ** levels
+    pad_h = (step - h % step) % step
+    pad_w = (step - w % step) % step
+    
+    src_f = cv2.copyMakeBorder(src, 0, pad_h, 0, pad_w, cv2.BORDER_REFLECT).astype(np.float32)
+    dst_f = cv2.copyMakeBorder(dst, 0, pad_h, 0, pad_w, cv2.BORDER_REFLECT).astype(np.float32)
+    mask_f = cv2.copyMakeBorder(mask, 0, pad_h, 0, pad_w, cv2.BORDER_REFLECT).astype(np.float32) / 255.0
+    
+    # Gaussian pyramids (mask stays single-channel)
+    src_pyr = [src_f]
+    dst_pyr = [dst_f]
+    mask_pyr = [mask_f]
+    for _ in range(levels):
+        src_pyr.append(cv2.pyrDown(src_pyr[-1]))
+        dst_pyr.append(cv2.pyrDown(dst_pyr[-1]))
+        mask_pyr.append(cv2.pyrDown(mask_pyr[-1]))
+    
+    # Coarsest level: plain alpha blend of the Gaussian residual
+    m = mask_pyr[levels]
+    blended = cv2.blendLinear(src_pyr[levels], dst_pyr[levels], m, 1 - m)
+    
+    # Collapse: blend each Laplacian band with the matching mask level
+    # (blendLinear fuses the per-pixel weighting into one pass)
+    for i in range(levels - 1, -1, -1):
+        size = (src_pyr[i].shape[1], src_pyr[i].shape[0])
+        lap_src = cv2.subtract(src_pyr[i], cv2.pyrUp(src_pyr[i + 1], dstsize=size))
+        lap_dst = cv2.subtract(dst_pyr[i], cv2.pyrUp(dst_pyr[i + 1], dstsize=size))
+        m = mask_pyr[i]
+        band = cv2.blendLinear(lap_src, lap_dst, m, 1 - m)
+        blended = cv2.add(cv2.pyrUp(blended, dstsize=size), band)
+    
+    return np.clip(blended[:h, :w], 0, 255).astype(np.uint8)
+
+
+def seamless_clone_safe(src, dst, mask, center, blend_mode="multiband"):
+    """
+    Blend src into dst inside mask.
+    blend_mode: "multiband" (default, fast) or "poisson" (seamlessClone, high quality)
+    Falls back to seamlessClone, then alpha blending if a method fails.
+    """
+    if blend_mode == "multiband":
+        try:
+            return multiband_blend(src, dst, mask), "multiband"
+        except Exception as e:
+            print(f"multiband blend failed: {e}, falling back to seamlessClone", file=sys.stderr)
+    
     try:
         result = cv2.seamlessClone(src, dst, mask, center, cv2.NORMAL_CLONE)
         return result, "seamless_clone"
     except Exception as e:
         print(f"seamlessClone failed: {e}, falling back to alpha blend", file=sys.stderr)
         
-        # Fallback: alpha blending
-        mask_float = mask.astype(np.float32) / 255.0
-        mask_3ch = np.dstack([mask_float] * 3)
+        # Fallback: alpha blending (single fused per-pixel pass)
+        m = mask.astype(np.float32) / 255.0
         
-        result = (src * mask_3ch + dst * (1 - mask_3ch)).astype(np.uint8)
+        result = cv2.blendLinear(src, dst, m, 1 - m)
         return result, "alpha_blend"
 
 
-def composite_face(hero_head_path, page_image_path, output_path, include_hair=True):
+def composite_face(hero_head_path, page_image_path, output_path, include_hair=True, blend_mode="multiband",
+                   intermediate_format="image"):
     """
     Main compositing function.
     
@@ -255,6 +461,8 @@ def composite_face(hero_head_path, page_image_path, output_path, include_hair=Tr
         page_image_path: Path to generated page image (target)
         output_path: Where to save the composited result
         include_hair: If True, use extended mask that includes hair
+        blend_mode: "multiband" (default) or "poisson" (seamlessClone, slower)
+        intermediate_format: "image" (default) or "raw" (BGR .npy for the next pipeline stage)
     
     Returns:
         dict with result info
@@ -268,9 +476,14 @@ def composite_face(hero_head_path, page_image_path, output_path, include_hair=Tr
             "message": "InsightFace not available"
         }
     
-    # Load images
-    hero = cv2.imread(hero_head_path)
-    page = cv2.imread(page_image_path)
+    # Hero is identical for every page of a book: reuse its cached landmarks, and its
+    # full-resolution shape to pick the decode mode without a trial decode
+    hero_cached = load_face_data(hero_head_path, ".landmarks")
+    hero_shape = hero_cached.get("shape") if hero_cached is not None else None
+    
+    # Load images (hero possibly at half resolution; page is the output canvas, always full)
+    hero, hero_scale = read_image_reduced(hero_head_path, hero_shape)
+    page = read_page(page_image_path)
     
     if hero is None:
         return {
@@ -286,39 +499,52 @@ def composite_face(hero_head_path, page_image_path, output_path, include_hair=Tr
             "message": f"Cannot read page image: {page_image_path}"
         }
     
-    # Detect faces
-    hero_landmarks, hero_bbox, hero_detected = detect_face_landmarks(hero, face_app)
+    # Detect hero (on cache miss) and page faces in one pass on the warm detector
+    try:
+        detections = detect_batch([page] if hero_cached is not None else [hero, page], with_embedding=False)
+    except Exception as e:
+        return {
+            "ok": False,
+            "error": "FACE_DETECTION_FAILED",
+            "message": str(e)
+        }
     
-    if not hero_detected:
+    if hero_cached is not None:
+        hero_landmarks = hero_cached["kps"]
+        hero_bbox = hero_cached["bbox"]
+    else:
+        hero_landmarks, hero_bbox = detect_best(hero, faces=detections[0])
+        if hero_landmarks is not None:
+            # Cache in full-resolution coordinates
+            hero_landmarks = hero_landmarks * hero_scale
+            hero_bbox = hero_bbox * hero_scale
+            hero_shape = np.array(hero.shape[:2]) * int(hero_scale)
+            save_face_data(hero_head_path, ".landmarks", kps=hero_landmarks, bbox=hero_bbox, shape=hero_shape)
+    
+    if hero_landmarks is None:
         return {
             "ok": False,
             "error": "NO_FACE_IN_HERO",
             "message": "No face detected in hero_head image"
         }
     
-    # Detect all faces in page, then select main one
-    try:
-        page_faces = face_app.get(page)
-        main_face = select_main_face(page_faces, page.shape) if page_faces else None
-        
-        if main_face is None:
-            return {
-                "ok": False,
-                "error": "NO_FACE_IN_PAGE",
-                "message": "No face detected in page image"
-            }
-        
-        page_landmarks = main_face.kps.astype(np.float32)
-        page_bbox = main_face.bbox.astype(np.float32)
-    except Exception as e:
+    # Select main face among all faces detected in page
+    page_landmarks, page_bbox = detect_best(page, faces=detections[-1])
+    
+    if page_landmarks is None:
         return {
             "ok": False,
-            "error": "PAGE_FACE_DETECTION_FAILED",
-            "message": str(e)
+            "error": "NO_FACE_IN_PAGE",
+            "message": "No face detected in page image"
         }
     
-    # Compute transform
-    transform = compute_similarity_transform(hero_landmarks, page_landmarks)
+    # Half-resolution hero must not be upscaled onto the page: reload at full size
+    if hero_scale > 1 and (hero_bbox[2] - hero_bbox[0]) / hero_scale < page_bbox[2] - page_bbox[0]:
+        hero = cv2.imread(hero_head_path)
+        hero_scale = 1.0
+    
+    # Compute transform (from hero image coordinates)
+    transform = compute_similarity_transform(hero_landmarks / hero_scale, page_landmarks)
     
     if transform is None:
         return {
@@ -327,23 +553,11 @@ def composite_face(hero_head_path, page_image_path, output_path, include_hair=Tr
             "message": "Could not compute similarity transform"
         }
     
-    # Warp hero_head to page space
-    warped_hero = cv2.warpAffine(
-        hero, 
-        transform, 
-        (page.shape[1], page.shape[0]),
-        flags=cv2.INTER_LINEAR,
-        borderMode=cv2.BORDER_REPLICATE
-    )
-    
     # Create mask in page space (around page face position)
     if include_hair:
-        mask = create_hair_extended_mask(page.shape, page_landmarks, page_bbox)
+        mask, mask_roi = create_hair_extended_mask(page.shape, page_landmarks, page_bbox, return_roi=True)
     else:
-        mask = create_face_mask(page.shape, page_landmarks, page_bbox)
-    
-    # Color match warped hero to page lighting
-    warped_hero_matched = color_match_lab(warped_hero, page, mask)
+        mask, mask_roi = create_face_mask(page.shape, page_landmarks, page_bbox, return_roi=True)
     
     # Calculate blend center
     center_x = int((page_bbox[0] + page_bbox[2]) / 2)
@@ -354,16 +568,49 @@ def composite_face(hero_head_path, page_image_path, output_path, include_hair=Tr
         face_h = page_bbox[3] - page_bbox[1]
         center_y = int(center_y - face_h * 0.1)
     
-    # Perform seamless clone
-    result, blend_method = seamless_clone_safe(
+    # Work on the face ROI only; seamlessClone re-centers the mask on the blend
+    # center, so leave room for that shift as well
+    margin = BLEND_MARGIN
+    if blend_mode == "multiband":
+        margin = max(margin, 2 ** (BLEND_LEVELS + 1))
+    if blend_mode == "poisson":
+        margin += int(max(abs(center_x - (mask_roi[0] + mask_roi[2]) / 2),
+                          abs(center_y - (mask_roi[1] + mask_roi[3]) / 2)))
+    x1, y1, x2, y2 = expand_roi(mask_roi, page.shape, margin)
+    if x1 >= x2 or y1 >= y2:
+        x1, y1, x2, y2 = 0, 0, page.shape[1], page.shape[0]
+    
+    # Warp hero_head straight into the ROI (translation shifted by the ROI origin)
+    roi_transform = transform.copy()
+    roi_transform[0, 2] -= x1
+    roi_transform[1, 2] -= y1
+    warped_hero = cv2.warpAffine(
+        hero,
+        roi_transform,
+        (x2 - x1, y2 - y1),
+        flags=cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_REPLICATE
+    )
+    
+    page_roi = page[y1:y2, x1:x2]
+    mask_roi = mask[y1:y2, x1:x2]
+    
+    # Color match warped hero to page lighting
+    warped_hero_matched = color_match_lab(warped_hero, page_roi, mask_roi)
+    
+    # Blend warped hero into page ROI and paste it back
+    blended_roi, blend_method = seamless_clone_safe(
         warped_hero_matched,
-        page,
-        mask,
-        (center_x, center_y)
+        page_roi,
+        mask_roi,
+        (center_x - x1, center_y - y1),
+        blend_mode=blend_mode
     )
+    result = page
+    result[y1:y2, x1:x2] = blended_roi
     
     # Save result
-    cv2.imwrite(output_path, result)
+    output_path = write_output(output_path, result, intermediate_format)
     
     return {
         "ok": True,
@@ -382,6 +629,10 @@ def main():
     parser.add_argument('--output', type=str, required=True, help='Output path for composited image')
     parser.add_argument('--include-hair', action='store_true', default=True, help='Include hair in mask (default: True)')
     parser.add_argument('--no-hair', action='store_true', help='Face only, no hair extension')
+    parser.add_argument('--blend', type=str, choices=['multiband', 'poisson'], default='multiband',
+                        help='Blend method: multiband (fast, default) or poisson (seamlessClone, high quality)')
+    parser.add_argument('--intermediate-format', type=str, choices=['image', 'raw'], default='image',
+                        help='Output format: image (encode by extension, default) or raw (BGR .npy, memory-mapped by the next stage)')
     
     args = parser.parse_args()
     
@@ -404,6 +655,8 @@ def main():
         print(json.dumps(result, ensure_ascii=False))
         sys.exit(1)
     
+    cv2.setNumThreads(max(1, (os.cpu_count() or 2) // 2))
+    
     # Validate input files
     if not os.path.exists(args.hero_head):
         result = {
@@ -434,7 +687,9 @@ def main():
         args.hero_head,
         args.page_image,
         args.output,
-        include_hair=include_hair
+        include_hair=include_hair,
+        blend_mode=args.blend,
+        intermediate_format=args.intermediate_format
     )
     
     print(json.dumps(result, ensure_ascii=False))
@@ -15,19 +15,22 @@ from pathlib import Path
 # Suppress warnings to reduce noise in stdout
 warnings.filterwarnings("ignore")
 
-try:
+import face_service
+from face_service import get_face_app, get_face_app_error, detect_batch, extract_embedding, face_model_id, load_face_data, save_face_data, json_default
+
+DEPENDENCIES_AVAILABLE = face_service.DEPENDENCIES_AVAILABLE and face_service.INSIGHTFACE_AVAILABLE
+IMPORT_ERROR = face_service.IMPORT_ERROR
+
+if face_service.DEPENDENCIES_AVAILABLE:
     import cv2
     import numpy as np
-    from insightface import app as insightface_app
-    from insightface.utils import face_align
-    DEPENDENCIES_AVAILABLE = True
-except ImportError as e:
-    DEPENDENCIES_AVAILABLE = False
-    IMPORT_ERROR = str(e)
 
 
-def extract_face_embedding(image_path, face_app):
-    """Extract face embedding from image using InsightFace"""
+def extract_face_embedding(image_path):
+    """
+    Extract face embedding from image using InsightFace
+    Returns: (normed_embedding as float32 ndarray, face_detected)
+    """
     if not DEPENDENCIES_AVAILABLE:
         return None, False
     
@@ -36,49 +39,243 @@ def extract_face_embedding(image_path, face_app):
         if img is None:
             return None, False
         
-        # Detect and extract face
-        faces = face_app.get(img)
-        
-        if faces is None or len(faces) == 0:
-            return None, False
-        
-        # Get embedding from first detected face
-        face = faces[0]
-        embedding = face.normed_embedding
-        
-        return embedding.tolist(), True
+        return extract_embedding(img)
     except Exception as e:
         return None, False
 
 
+def extract_reference_embedding(reference_path):
+    """
+    Extract reference embedding, cached per path + mtime (in process and as
+    <reference>.embedding.npz) so the reference is only processed once per book.
+    The cache also records the recognition model variant (FP32/INT8) and is ignored
+    when it was written by a different one.
+    reference_path may also be a .npy embedding written by extract-only mode.
+    """
+    # Embedding saved by extract-only mode (.npy): memory-map it, no detection needed
+    if reference_path.endswith('.npy'):
+        try:
+            return np.load(reference_path, mmap_mode='r'), True
+        except (OSError, ValueError):
+            return None, False
+    
+    model_id = face_model_id()
+    cached = load_face_data(reference_path, ".embedding")
+    if cached is not None and "model" in cached and cached["model"].item() == model_id:
+        return cached["embedding"], True
+    
+    embedding, face_detected = extract_face_embedding(reference_path)
+    if face_detected:
+        save_face_data(reference_path, ".embedding", embedding=embedding, model=np.array(model_id))
+    
+    return embedding, face_detected
+
+
 def cosine_similarity(embed1, embed2):
-    """Calculate cosine similarity between two embeddings"""
+    """
+    Calculate cosine similarity between two InsightFace normed embeddings.
+    Both are unit-norm, so this is a single dot product.
+    """
     if embed1 is None or embed2 is None:
         return 0.0
     
     try:
-        vec1 = np.array(embed1)
-        vec2 = np.array(embed2)
-        
-        dot_product = np.dot(vec1, vec2)
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
-        
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-        
-        similarity = dot_product / (norm1 * norm2)
-        return float(similarity)
+        return float(np.dot(embed1, embed2))
     except Exception:
         return 0.0
 
 
+def extract_reference(reference_path):
+    """
+    Extract reference embedding.
+    Returns: result dict (same shape as the extract-only JSON output; embedding as ndarray)
+    """
+    if not os.path.exists(reference_path):
+        return {
+            "ok": False,
+            "error": "FILE_NOT_FOUND",
+            "message": f"Reference photo not found: {reference_path}"
+        }
+    
+    embedding, face_detected = extract_reference_embedding(reference_path)
+    
+    if not face_detected:
+        return {
+            "ok": False,
+            "error": "NO_FACE_DETECTED",
+            "message": "No face detected in reference photo"
+        }
+    
+    return {
+        "ok": True,
+        "embedding": embedding,
+        "embedding_dim": len(embedding),
+        "face_detected": True,
+        "reference_path": reference_path
+    }
+
+
+def extract_references_batch(image_paths):
+    """
+    Extract embeddings for several images with a single detection pass.
+    Returns: list of result dicts (same shape as extract_reference), one per path
+    """
+    images = [cv2.imread(p) if os.path.exists(p) else None for p in image_paths]
+    faces_per_image = detect_batch(images)
+    
+    results = []
+    for image_path, image, faces in zip(image_paths, images, faces_per_image):
+        if image is None:
+            results.append({
+                "ok": False,
+                "error": "FILE_NOT_FOUND",
+                "message": f"Image not found or unreadable: {image_path}"
+            })
+            continue
+        
+        if len(faces) == 0:
+            results.append({
+                "ok": False,
+                "error": "NO_FACE_DETECTED",
+                "message": "No face detected in image",
+                "reference_path": image_path
+            })
+            continue
+        
+        embedding = faces[0].normed_embedding
+        results.append({
+            "ok": True,
+            "embedding": embedding,
+            "embedding_dim": len(embedding),
+            "face_detected": True,
+            "reference_path": image_path
+        })
+    
+    return results
+
+
+def check_similarity(reference_path, candidate_path):
+    """
+    Compare reference photo against candidate image.
+    Returns: result dict (same shape as the similarity JSON output)
+    """
+    if not os.path.exists(reference_path):
+        return {
+            "ok": False,
+            "error": "FILE_NOT_FOUND",
+            "message": f"Reference photo not found: {reference_path}"
+        }
+    
+    if not os.path.exists(candidate_path):
+        return {
+            "ok": False,
+            "error": "FILE_NOT_FOUND",
+            "message": f"Candidate image not found: {candidate_path}"
+        }
+    
+    # Extract embeddings
+    ref_embedding, ref_face_detected = extract_reference_embedding(reference_path)
+    cand_embedding, cand_face_detected = extract_face_embedding(candidate_path)
+    
+    if not ref_face_detected:
+        return {
+            "ok": False,
+            "error": "NO_FACE_DETECTED",
+            "message": "No face detected in reference photo",
+            "face_detected_ref": False,
+            "face_detected_candidate": cand_face_detected
+        }
+    
+    if not cand_face_detected:
+        return {
+            "ok": False,
+            "error": "NO_FACE_DETECTED",
+            "message": "No face detected in candidate image",
+            "face_detected_ref": True,
+            "face_detected_candidate": False
+        }
+    
+    # Calculate similarity
+    similarity = cosine_similarity(ref_embedding, cand_embedding)
+    
+    return {
+        "ok": True,
+        "embedding_dim": len(ref_embedding),
+        "similarity": similarity,
+        "face_detected_ref": True,
+        "face_detected_candidate": True
+    }
+
+
+def check_similarity_batch(reference_path, candidate_paths):
+    """
+    Compare reference against several candidates: candidate embeddings are
+    stacked into one (N, dim) array and scored with a single matrix-vector product.
+    Returns: {"ok", "embedding_dim", "results": [per-candidate similarity dicts]}
+    """
+    if not os.path.exists(reference_path):
+        return {
+            "ok": False,
+            "error": "FILE_NOT_FOUND",
+            "message": f"Reference photo not found: {reference_path}"
+        }
+    
+    ref_embedding, ref_face_detected = extract_reference_embedding(reference_path)
+    
+    if not ref_face_detected:
+        return {
+            "ok": False,
+            "error": "NO_FACE_DETECTED",
+            "message": "No face detected in reference photo",
+            "face_detected_ref": False
+        }
+    
+    images = [cv2.imread(p) if os.path.exists(p) else None for p in candidate_paths]
+    faces_per_image = detect_batch(images)
+    
+    detected = [i for i, faces in enumerate(faces_per_image) if len(faces) > 0]
+    similarities = {}
+    if detected:
+        stacked = np.stack([faces_per_image[i][0].normed_embedding for i in detected])
+        similarities = dict(zip(detected, (stacked @ ref_embedding).tolist()))
+    
+    results = []
+    for i, candidate_path in enumerate(candidate_paths):
+        if images[i] is None:
+            results.append({
+                "ok": False,
+                "error": "FILE_NOT_FOUND",
+                "message": f"Candidate image not found: {candidate_path}",
+                "face_detected_candidate": False
+            })
+        elif i not in similarities:
+            results.append({
+                "ok": False,
+                "error": "NO_FACE_DETECTED",
+                "message": "No face detected in candidate image",
+                "face_detected_candidate": False
+            })
+        else:
+            results.append({
+                "ok": True,
+                "similarity": similarities[i],
+                "face_detected_ref": True,
+                "face_detected_candidate": True
+            })
+    
+    return {
+        "ok": True,
+        "embedding_dim": len(ref_embedding),
+        "results": results
+    }
+
+
 def main():
     parser = argparse.ArgumentParser(description='FaceID extraction and similarity checking')
     parser.add_argument('--extract-only', action='store_true', help='Extract embedding only, save to JSON')
-    parser.add_argument('--reference', type=str, help='Path to reference photo')
+    parser.add_argument('--reference', type=str, help='Path to reference photo (or .npy embedding from extract-only mode)')
     parser.add_argument('--candidate', type=str, help='Path to candidate image (for similarity check)')
-    parser.add_argument('--output', type=str, help='Output JSON path (for extract-only mode)')
+    parser.add_argument('--output', type=str, help='Output JSON path (for extract-only mode); embedding saved as .npy next to it')
     
     args = parser.parse_args()
     
@@ -92,15 +289,13 @@ def main():
         print(json.dumps(result, ensure_ascii=False))
         sys.exit(1)
     
-    # Initialize InsightFace
-    try:
-        face_app = insightface_app.FaceAnalysis(providers=['CPUExecutionProvider'])
-        face_app.prepare(ctx_id=-1, det_size=(640, 640))
-    except Exception as e:
+    # Initialize InsightFace (shared process-wide instance)
+    face_app = get_face_app()
+    if face_app is None:
         result = {
             "ok": False,
             "error": "INIT_FAILED",
-            "message": f"Failed to initialize InsightFace: {str(e)}"
+            "message": f"Failed to initialize InsightFace: {get_face_app_error()}"
         }
         print(json.dumps(result, ensure_ascii=False))
         sys.exit(1)
@@ -116,35 +311,12 @@ def main():
             print(json.dumps(result, ensure_ascii=False))
             sys.exit(1)
         
-        if not os.path.exists(args.reference):
-            result = {
-                "ok": False,
-                "error": "FILE_NOT_FOUND",
-                "message": f"Reference photo not found: {args.reference}"
-            }
-            print(json.dumps(result, ensure_ascii=False))
-            sys.exit(1)
-        
-        embedding, face_detected = extract_face_embedding(args.reference, face_app)
+        output_data = extract_reference(args.reference)
         
-        if not face_detected:
-            result = {
-                "ok": False,
-                "error": "NO_FACE_DETECTED",
-                "message": "No face detected in reference photo"
-            }
-            print(json.dumps(result, ensure_ascii=False))
+        if not output_data.get("ok"):
+            print(json.dumps(output_data, ensure_ascii=False))
             sys.exit(1)
         
-        # Build output data
-        output_data = {
-            "ok": True,
-            "embedding": embedding,
-            "embedding_dim": len(embedding),
-            "face_detected": True,
-            "reference_path": args.reference
-        }
-        
         # If --output is provided, write to file; otherwise print to stdout
         if args.output:
             # Ensure output directory exists
@@ -152,7 +324,12 @@ def main():
             if output_dir:
                 os.makedirs(output_dir, exist_ok=True)
             
-            # Write JSON to file
+            # Raw float32 embedding goes to .npy; the JSON only references it
+            embedding_path = os.path.splitext(args.output)[0] + '.npy'
+            embedding = output_data.pop("embedding")
+            np.save(embedding_path, np.asarray(embedding, dtype=np.float32))
+            output_data["embedding_path"] = embedding_path
+            
             with open(args.output, 'w') as f:
                 json.dump(output_data, f, ensure_ascii=False)
             
@@ -160,7 +337,7 @@ def main():
             print(f"Saved embedding to {args.output}", file=sys.stderr)
         else:
             # Print JSON to stdout (original behavior)
-            print(json.dumps(output_data, ensure_ascii=False))
+            print(json.dumps(output_data, ensure_ascii=False, default=json_default))
         
         sys.exit(0)
     
@@ -174,65 +351,11 @@ def main():
         print(json.dumps(result, ensure_ascii=False))
         sys.exit(1)
     
-    if not os.path.exists(args.reference):
-        result = {
-            "ok": False,
-            "error": "FILE_NOT_FOUND",
-            "message": f"Reference photo not found: {args.reference}"
-        }
-        print(json.dumps(result, ensure_ascii=False))
-        sys.exit(1)
-    
-    if not os.path.exists(args.candidate):
-        result = {
-            "ok": False,
-            "error": "FILE_NOT_FOUND",
-            "message": f"Candidate image not found: {args.candidate}"
-        }
-        print(json.dumps(result, ensure_ascii=False))
-        sys.exit(1)
-    
-    # Extract embeddings
-    ref_embedding, ref_face_detected = extract_face_embedding(args.reference, face_app)
-    cand_embedding, cand_face_detected = extract_face_embedding(args.candidate, face_app)
-    
-    if not ref_face_detected:
-        result = {
-            "ok": False,
-            "error": "NO_FACE_DETECTED",
-            "message": "No face detected in reference photo",
-            "face_detected_ref": False,
-            "face_detected_candidate": cand_face_detected
-        }
-        print(json.dumps(result, ensure_ascii=False))
-        sys.exit(1)
-    
-    if not cand_face_detected:
-        result = {
-            "ok": False,
-            "error": "NO_FACE_DETECTED",
-            "message": "No face detected in candidate image",
-            "face_detected_ref": True,
-            "face_detected_candidate": False
-        }
-        print(json.dumps(result, ensure_ascii=False))
-        sys.exit(1)
-    
-    # Calculate similarity
-    similarity = cosine_similarity(ref_embedding, cand_embedding)
-    
-    result = {
-        "ok": True,
-        "embedding_dim": len(ref_embedding),
-        "similarity": similarity,
-        "face_detected_ref": True,
-        "face_detected_candidate": True
-    }
+    result = check_similarity(args.reference, args.candidate)
     
     print(json.dumps(result, ensure_ascii=False))
-    sys.exit(0)
+    sys.exit(0 if result.get("ok") else 1)
 
 
 if __name__ == "__main__":
     main()
-
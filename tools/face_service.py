@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Shared InsightFace service for the face tools
+
+Holds the process-wide FaceAnalysis instance so face_id.py, face_composite.py
+and face_worker.py pay the ONNX model load/warm-up once per process instead of
+once per call.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import tempfile
+import warnings
+
+# Suppress warnings to reduce noise in stdout
+warnings.filterwarnings("ignore")
+
+# Check dependencies
+DEPENDENCIES_AVAILABLE = True
+IMPORT_ERROR = None
+
+try:
+    import cv2
+    import numpy as np
+except ImportError as e:
+    DEPENDENCIES_AVAILABLE = False
+    IMPORT_ERROR = f"OpenCV/NumPy: {str(e)}"
+
+try:
+    import onnxruntime
+    from insightface import app as insightface_app
+    from insightface.app.common import Face
+    INSIGHTFACE_AVAILABLE = True
+except ImportError as e:
+    INSIGHTFACE_AVAILABLE = False
+    if IMPORT_ERROR is None:
+        IMPORT_ERROR = f"InsightFace: {str(e)}"
+
+# Only detection (kps/bbox) and recognition (normed_embedding) are used by the tools;
+# skipping the landmark/genderage models saves their load time and per-face inference
+FACE_MODULES = ['detection', 'recognition']
+FACE_MODEL_NAME = os.environ.get("FACE_MODEL_NAME", "buffalo_l")
+INSIGHTFACE_ROOT = os.path.expanduser(os.environ.get("INSIGHTFACE_ROOT", "~/.insightface"))
+
+# Detector input sizes: SCRFD cost scales with det_size^2 and storybook faces are
+# large, so detect at 320 first and only retry at 640 when nothing is found
+DET_SIZE = (640, 640)
+DET_SIZE_SMALL = (320, 320)
+
+# ONNX Runtime session tuning; sessions are only rebuilt when one of these is set
+# (0 threads = keep InsightFace's default sessions)
+FACE_ORT_THREADS = int(os.environ.get("FACE_ORT_THREADS", "0"))
+FACE_ONNX_INT8 = os.environ.get("FACE_ONNX_INT8", "").lower() in ("1", "true")
+INT8_MODEL_DIR = os.path.join(INSIGHTFACE_ROOT, "models", FACE_MODEL_NAME + "_int8")
+INT8_MANIFEST = "manifest.json"
+
+# Global face detector (lazy init)
+_face_app = None
+_face_app_error = None
+
+# Per-image face data (hero landmarks, reference embedding) keyed by path + mtime
+_face_data_cache = {}
+
+
+def get_face_app():
+    """Get or initialize InsightFace detector"""
+    global _face_app, _face_app_error
+    if _face_app is None and INSIGHTFACE_AVAILABLE:
+        try:
+            _face_app = insightface_app.FaceAnalysis(
+                name=FACE_MODEL_NAME,
+                root=INSIGHTFACE_ROOT,
+                allowed_modules=FACE_MODULES,
+                providers=['CPUExecutionProvider']
+            )
+            _face_app.prepare(ctx_id=-1, det_size=DET_SIZE)
+            if FACE_ORT_THREADS or FACE_ONNX_INT8:
+                tune_sessions(_face_app)
+            _face_app_error = None
+        except Exception as e:
+            _face_app = None
+            _face_app_error = str(e)
+            print(f"Warning: Failed to init InsightFace: {e}", file=sys.stderr)
+            return None
+    return _face_app
+
+
+def session_options():
+    """ONNX Runtime session options for the face models"""
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = FACE_ORT_THREADS
+    options.enable_cpu_mem_arena = False
+    return options
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    """Cheap identity of a model file (size + mtime, without reading it)"""
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def int8_model_path(model_file):
+    """
+    Quantized counterpart of model_file written by quantize_face_models.py.
+    Returns None (use FP32) when missing, or when the manifest no longer matches the
+    files (sizes only: models are not hashed on every start).
+    """
+    manifest_path = os.path.join(INT8_MODEL_DIR, INT8_MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            entry = json.load(f).get(os.path.basename(model_file))
+    except (OSError, ValueError):
+        return None
+    if not entry:
+        return None
+    
+    int8_path = os.path.join(INT8_MODEL_DIR, entry.get("file", ""))
+    try:
+        if entry.get("source_size") != os.path.getsize(model_file) or entry.get("size") != os.path.getsize(int8_path):
+            print(f"Warning: INT8 model {int8_path} does not match manifest, using FP32", file=sys.stderr)
+            return None
+    except OSError:
+        return None
+    return int8_path
+
+
+def tune_sessions(face_app):
+    """
+    Recreate each model's ONNX session with tuned options (InsightFace does not pass
+    session options through), using the INT8 model where enabled and available.
+    """
+    options = session_options()
+    for taskname, model in face_app.models.items():
+        model_file = model.model_file
+        if FACE_ONNX_INT8:
+            model_file = int8_model_path(model.model_file) or model_file
+        try:
+            model.session = onnxruntime.InferenceSession(
+                model_file,
+                sess_options=options,
+                providers=['CPUExecutionProvider']
+            )
+            model.session_file = model_file
+        except Exception as e:
+            print(f"Warning: Keeping default session for {taskname}: {e}", file=sys.stderr)
+
+
+def face_model_id(taskname="recognition"):
+    """
+    Identify the model variant a task runs with (file name + size + mtime of the file
+    its session was loaded from), so cached outputs of another variant can be rejected.
+    Returns None if InsightFace is unavailable.
+    """
+    face_app = get_face_app()
+    if face_app is None:
+        return None
+    model = face_app.models[taskname]
+    model_file = getattr(model, "session_file", model.model_file)
+    return f"{os.path.basename(model_file)}:{file_fingerprint(model_file)}"
+
+
+def json_default(obj):
+    """json.dumps default= hook: serialize NumPy arrays/scalars only at the output boundary"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def get_face_app_error():
+    """Return the last InsightFace initialization error, if any"""
+    if not INSIGHTFACE_AVAILABLE:
+        return IMPORT_ERROR
+    return _face_app_error
+
+
+def detect(image, prefer_small=True, with_embedding=True):
+    """
+    Detect faces in a BGR image, returning a (possibly empty) list of InsightFace faces.
+    prefer_small: Try DET_SIZE_SMALL first, falling back to DET_SIZE if no face is found
+    with_embedding: If False, skip the recognition model (bbox/kps/det_score only)
+    """
+    face_app = get_face_app()
+    if face_app is None or image is None:
+        return []
+    
+    sizes = [DET_SIZE_SMALL, DET_SIZE] if prefer_small else [DET_SIZE]
+    for size in sizes:
+        bboxes, kpss = face_app.det_model.detect(image, input_size=size, max_num=0, metric='default')
+        if bboxes.shape[0] > 0:
+            break
+    
+    faces = []
+    for i in range(bboxes.shape[0]):
+        face = Face(bbox=bboxes[i, 0:4], kps=kpss[i] if kpss is not None else None, det_score=bboxes[i, 4])
+        if with_embedding:
+            for taskname, model in face_app.models.items():
+                if taskname != 'detection':
+                    model.get(image, face)
+        faces.append(face)
+    return faces
+
+
+def extract_embedding(image):
+    """
+    Extract the normed embedding (unit-norm float32 ndarray) of the first detected face.
+    Returns: (embedding, face_detected)
+    """
+    faces = detect(image)
+    if len(faces) == 0:
+        return None, False
+    return faces[0].normed_embedding, True
+
+
+def detect_batch(images, prefer_small=True, with_embedding=True):
+    """
+    Run detection over several images back-to-back on the warm ONNX session.
+    Returns: list of face lists, one per input image (empty list for unreadable images)
+    """
+    return [detect(image, prefer_small=prefer_small, with_embedding=with_embedding) for image in images]
+
+
+def _face_data_key(image_path, suffix):
+    return (os.path.abspath(image_path), suffix, os.path.getmtime(image_path))
+
+
+def load_face_data(image_path, suffix):
+    """
+    Load cached face data for an image (e.g. suffix=".landmarks").
+    Checks the in-process cache first, then <image_path><suffix>.npz next to the image.
+    Entries are invalidated when the image mtime changes.
+    Returns: dict of arrays, or None on miss
+    """
+    try:
+        key = _face_data_key(image_path, suffix)
+    except OSError:
+        return None
+    
+    data = _face_data_cache.get(key)
+    if data is not None:
+        return data
+    
+    cache_path = image_path + suffix + ".npz"
+    try:
+        with np.load(cache_path) as npz:
+            if float(npz["mtime"]) != key[2]:
+                return None
+            data = {name: npz[name] for name in npz.files if name != "mtime"}
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # Corrupt/truncated sidecar (BadZipFile, EOFError, ...): treat as a miss and drop it
+        print(f"Warning: Discarding unreadable face data cache {cache_path}: {e}", file=sys.stderr)
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+        return None
+    
+    _face_data_cache[key] = data
+    return data
+
+
+def save_face_data(image_path, suffix, **arrays):
+    """Store face data for an image in memory and as <image_path><suffix>.npz (best effort)"""
+    try:
+        key = _face_data_key(image_path, suffix)
+    except OSError:
+        return
+    
+    _face_data_cache[key] = arrays
+    
+    # Write to a temp file and rename so concurrent readers (e.g. face_batch pool
+    # workers) never see a partially written sidecar
+    cache_path = image_path + suffix + ".npz"
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cache_path)), suffix=".npz.tmp")
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, mtime=np.float64(key[2]), **arrays)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Failed to write face data cache for {image_path}: {e}", file=sys.stderr)
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
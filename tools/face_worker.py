@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Face Worker - long-lived face_id/face_composite process
+
+Loads InsightFace once, then serves jobs read from stdin as JSON lines.
+One JSON result line is written to stdout per job (the job "id" is echoed back).
+
+Jobs:
+  {"op": "embed", "path": "..."}
+  {"op": "embed_batch", "paths": ["...", "..."]}
+  {"op": "similarity", "reference": "...", "candidate": "..."}
+  {"op": "similarity_batch", "reference": "...", "candidates": ["...", "..."]}
+  {"op": "composite", "hero_head": "...", "page_image": "...", "output": "...", "include_hair": true,
+   "blend": "multiband"|"poisson", "intermediate_format": "image"|"raw"}
+
+On startup a {"ok": true, "ready": true} line is written once the model is loaded.
+"""
+
+import sys
+import json
+import os
+import warnings
+
+# Suppress warnings to reduce noise in stdout
+warnings.filterwarnings("ignore")
+
+import face_service
+from face_service import get_face_app, get_face_app_error, json_default
+
+import face_id
+import face_composite
+
+
+def run_embed(job):
+    """Extract embedding for a single image"""
+    path = job.get("path")
+    if not path:
+        return {"ok": False, "error": "MISSING_ARGS", "message": "embed requires path"}
+    return face_id.extract_reference(path)
+
+
+def run_embed_batch(job):
+    """Extract embeddings for several images in one detection pass"""
+    paths = job.get("paths")
+    if not paths or not isinstance(paths, list):
+        return {"ok": False, "error": "MISSING_ARGS", "message": "embed_batch requires paths"}
+    return {"ok": True, "results": face_id.extract_references_batch(paths)}
+
+
+def run_similarity(job):
+    """Compare reference against candidate"""
+    reference = job.get("reference")
+    candidate = job.get("candidate")
+    if not reference or not candidate:
+        return {
+            "ok": False,
+            "error": "MISSING_ARGS",
+            "message": "similarity requires reference and candidate"
+        }
+    return face_id.check_similarity(reference, candidate)
+
+
+def run_similarity_batch(job):
+    """Compare reference against several candidates with one stacked similarity pass"""
+    reference = job.get("reference")
+    candidates = job.get("candidates")
+    if not reference or not candidates or not isinstance(candidates, list):
+        return {
+            "ok": False,
+            "error": "MISSING_ARGS",
+            "message": "similarity_batch requires reference and candidates"
+        }
+    return face_id.check_similarity_batch(reference, candidates)
+
+
+def run_composite(job):
+    """Composite hero_head onto a page image"""
+    hero_head = job.get("hero_head")
+    page_image = job.get("page_image")
+    output = job.get("output")
+    if not hero_head or not page_image or not output:
+        return {
+            "ok": False,
+            "error": "MISSING_ARGS",
+            "message": "composite requires hero_head, page_image and output"
+        }
+
+    output_dir = os.path.dirname(output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    return face_composite.composite_face(
+        hero_head,
+        page_image,
+        output,
+        include_hair=job.get("include_hair", True),
+        blend_mode=job.get("blend", "multiband"),
+        intermediate_format=job.get("intermediate_format", "image")
+    )
+
+
+OPS = {
+    "embed": run_embed,
+    "embed_batch": run_embed_batch,
+    "similarity": run_similarity,
+    "similarity_batch": run_similarity_batch,
+    "composite": run_composite,
+}
+
+
+def dispatch(job):
+    """Route a job to its handler"""
+    handler = OPS.get(job.get("op"))
+    if handler is None:
+        return {
+            "ok": False,
+            "error": "UNKNOWN_OP",
+            "message": f"Unknown op: {job.get('op')}"
+        }
+    try:
+        return handler(job)
+    except Exception as e:
+        return {"ok": False, "error": "JOB_FAILED", "message": str(e)}
+
+
+def write_result(result):
+    sys.stdout.write(json.dumps(result, ensure_ascii=False, default=json_default) + "\n")
+    sys.stdout.flush()
+
+
+def main():
+    if not face_service.DEPENDENCIES_AVAILABLE or not face_service.INSIGHTFACE_AVAILABLE:
+        write_result({
+            "ok": False,
+            "error": "DEPENDENCIES_MISSING",
+            "message": f"Required Python packages not installed: {face_service.IMPORT_ERROR}",
+            "required_packages": ["opencv-python", "insightface", "numpy"]
+        })
+        sys.exit(1)
+
+    face_composite.cv2.setNumThreads(max(1, (os.cpu_count() or 2) // 2))
+
+    face_app = get_face_app()
+    if face_app is None:
+        write_result({
+            "ok": False,
+            "error": "INIT_FAILED",
+            "message": f"Failed to initialize InsightFace: {get_face_app_error()}"
+        })
+        sys.exit(1)
+
+    write_result({"ok": True, "ready": True})
+
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break  # stdin closed, caller is done
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            job = json.loads(line)
+        except ValueError as e:
+            write_result({"ok": False, "error": "INVALID_JOB", "message": str(e)})
+            continue
+
+        if not isinstance(job, dict):
+            write_result({"ok": False, "error": "INVALID_JOB", "message": "Job must be a JSON object"})
+            continue
+
+        result = dispatch(job)
+        if "id" in job:
+            result["id"] = job["id"]
+        write_result(result)
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
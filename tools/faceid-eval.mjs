@@ -144,6 +144,13 @@ async function runEvaluation() {
   }
   console.log(`✓ Embedding extracted (dim: ${extractionResult.embedding_dim})`);
 
+  // Score candidates against the extracted .npy embedding (memory-mapped by face_id.py,
+  // no reference re-detection per candidate); fall back to the photo if it is missing
+  const tempNpyPath = tempEmbeddingPath.replace(/\.json$/, '.npy');
+  const similarityRef = extractionResult.embedding_path && fs.existsSync(extractionResult.embedding_path)
+    ? extractionResult.embedding_path
+    : refPath;
+
   // Process all fixtures
   const results = [];
   let totalGood = 0;
@@ -180,7 +187,7 @@ async function runEvaluation() {
       }
 
       // Check similarity
-      const similarityResult = await checkSimilarity(refPath, filePath);
+      const similarityResult = await checkSimilarity(similarityRef, filePath);
       if (!similarityResult.ok) {
         results.push({
           set: 'good',
@@ -269,7 +276,7 @@ async function runEvaluation() {
       }
 
       // Check similarity
-      const similarityResult = await checkSimilarity(refPath, filePath);
+      const similarityResult = await checkSimilarity(similarityRef, filePath);
       if (!similarityResult.ok) {
         // Error in similarity check - treat as PASS for bad fixtures (different person should fail)
         results.push({
@@ -393,9 +400,11 @@ async function runEvaluation() {
     console.log(`CSV report: ${csvPath}`);
   }
 
-  // Cleanup temp embedding
-  if (fs.existsSync(tempEmbeddingPath)) {
-    fs.unlinkSync(tempEmbeddingPath);
+  // Cleanup temp embedding (JSON + raw .npy embedding written next to it)
+  for (const tempPath of [tempEmbeddingPath, tempNpyPath]) {
+    if (fs.existsSync(tempPath)) {
+      fs.unlinkSync(tempPath);
+    }
   }
 
   // Strict mode: exit with error if expectations violated
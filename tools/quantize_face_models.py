@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Quantize InsightFace recognition model to INT8 for face_service (FACE_ONNX_INT8=1)
+
+Writes <model>.int8.onnx files plus a manifest.json into a separate model
+directory (default: ~/.insightface/models/buffalo_l_int8) so FaceAnalysis
+never picks them up on its own. face_service verifies the manifest before
+loading a quantized model and falls back to FP32 otherwise.
+
+Only the ArcFace recognition model is quantized (dynamic INT8). The SCRFD
+detector stays FP32: static quantization needs a calibration set.
+
+Output: JSON with quantized models
+"""
+
+import sys
+import json
+import argparse
+import os
+import warnings
+
+warnings.filterwarnings("ignore")
+
+import face_service
+
+# Check dependencies
+DEPENDENCIES_AVAILABLE = True
+IMPORT_ERROR = None
+
+try:
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+except ImportError as e:
+    DEPENDENCIES_AVAILABLE = False
+    IMPORT_ERROR = f"onnxruntime.quantization: {str(e)}"
+
+# Recognition models shipped in InsightFace model packs
+RECOGNITION_MODELS = ["w600k_r50.onnx", "w600k_mbf.onnx"]
+
+
+def quantize_model(source_path, output_dir):
+    """Dynamic INT8 quantization of one model; returns its manifest entry"""
+    name = os.path.basename(source_path)
+    int8_name = name[:-len(".onnx")] + ".int8.onnx"
+    int8_path = os.path.join(output_dir, int8_name)
+
+    quantize_dynamic(source_path, int8_path, weight_type=QuantType.QInt8)
+
+    return {
+        "file": int8_name,
+        "source_size": os.path.getsize(source_path),
+        "size": os.path.getsize(int8_path),
+        "sha256": face_service.file_sha256(int8_path)
+    }
+
+
+def main():
+    default_model_dir = os.path.join(face_service.INSIGHTFACE_ROOT, "models", face_service.FACE_MODEL_NAME)
+
+    parser = argparse.ArgumentParser(description='Quantize InsightFace recognition model to INT8')
+    parser.add_argument('--model-dir', type=str, default=default_model_dir, help='FP32 model pack directory')
+    parser.add_argument('--output-dir', type=str, default=face_service.INT8_MODEL_DIR, help='Output directory for INT8 models')
+
+    args = parser.parse_args()
+
+    if not DEPENDENCIES_AVAILABLE:
+        result = {
+            "ok": False,
+            "error": "DEPENDENCIES_MISSING",
+            "message": f"Required packages not installed: {IMPORT_ERROR}",
+            "required_packages": ["onnxruntime", "onnx"]
+        }
+        print(json.dumps(result, ensure_ascii=False))
+        sys.exit(1)
+
+    sources = [os.path.join(args.model_dir, name) for name in RECOGNITION_MODELS]
+    sources = [p for p in sources if os.path.exists(p)]
+
+    if not sources:
+        result = {
+            "ok": False,
+            "error": "MODEL_NOT_FOUND",
+            "message": f"No recognition model found in {args.model_dir}"
+        }
+        print(json.dumps(result, ensure_ascii=False))
+        sys.exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    manifest = {}
+    for source_path in sources:
+        manifest[os.path.basename(source_path)] = quantize_model(source_path, args.output_dir)
+
+    with open(os.path.join(args.output_dir, face_service.INT8_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    result = {
+        "ok": True,
+        "output_dir": args.output_dir,
+        "models": manifest
+    }
+
+    print(json.dumps(result, ensure_ascii=False))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,10 @@ import json
 import argparse
 import os
 import warnings
-from pathlib import Path
+import importlib.util
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
 
 warnings.filterwarnings("ignore")
 
@@ -31,17 +34,66 @@ except ImportError as e:
     DEPENDENCIES_AVAILABLE = False
     IMPORT_ERROR = f"OpenCV/NumPy: {str(e)}"
 
-# Optional: pytesseract for OCR verification
-PYTESSERACT_AVAILABLE = False
+# Optional: orjson for result serialization (C implementation, falls back to json)
 try:
-    import pytesseract
-    PYTESSERACT_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    pass
+    ORJSON_AVAILABLE = False
+
+# Optional: pytesseract for OCR verification. Only located here; the import
+# itself is deferred to get_pytesseract() so runs without --verify-ocr skip it
+PYTESSERACT_AVAILABLE = importlib.util.find_spec("pytesseract") is not None
+pytesseract = None
+
+def env_int(*names):
+    """
+    Leading integer of the first of the given env vars that has one, else None.
+    Parsed leniently (e.g. OMP_NUM_THREADS="4,2" -> 4, "auto" is skipped) so a
+    bad value never keeps the script from emitting its JSON result.
+    """
+    for name in names:
+        match = re.match(r"\s*(\d+)", os.environ.get(name, ""))
+        if match:
+            return int(match.group(1))
+    return None
+
 
 # EAST model path (can be overridden by env var)
 EAST_MODEL_PATH = os.environ.get("EAST_MODEL_PATH", "")
 
+# OpenCV worker threads (dnn, Canny, dilate, ...); EAST_THREADS, else OMP_NUM_THREADS, else all cores
+EAST_THREADS = env_int("EAST_THREADS", "OMP_NUM_THREADS") or (os.cpu_count() or 1)
+
+# Opt-in GPU inference for EAST (CUDA if OpenCV was built with it, else OpenCL)
+EAST_GPU = os.environ.get("EAST_GPU", "").lower() in ("1", "true")
+
+# EAST input normalization: per-channel mean in RGB order (blob is built with swapRB)
+EAST_MEAN = (123.68, 116.78, 103.94)
+
+# EAST output layers: text score map and box geometry
+EAST_OUTPUT_LAYERS = [
+    "feature_fusion/Conv_7/Sigmoid",
+    "feature_fusion/concat_3"
+]
+
+# Parallel OCR verification threads
+OCR_MAX_WORKERS = 8
+
+# Images per EAST forward pass in batch mode (bounds the blob/activation memory:
+# each full-resolution page adds tens of MB of feature maps)
+EAST_BATCH_SIZE = max(1, env_int("EAST_BATCH_SIZE") or 4)
+
+# Fallback detector works on images downsampled to roughly this size
+FALLBACK_MAX_SIZE = 512
+
+# Preallocated (resized, planes, blob) buffers keyed by (new_h, new_w); only the most
+# recent size is kept, so a long-lived --server process doesn't grow with every new size
+_BLOB_CACHE = {}
+
+# Loaded EAST networks keyed by model path (graph parsed once per process)
+_EAST_NET_CACHE = {}
+
 
 def download_east_model(model_dir):
     """
@@ -58,6 +110,131 @@ def download_east_model(model_dir):
     return None
 
 
+def configure_opencv(verbose=False):
+    """
+    Enable OpenCV's optimized (SIMD-dispatched) code paths and set its thread count.
+    verbose: Print the build's SIMD/parallel framework lines to stderr, to verify
+    that AVX2/AVX-512 kernels are compiled in.
+    """
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(EAST_THREADS)
+    
+    if verbose:
+        keys = ("Baseline:", "Dispatched code generation:", "Parallel framework:")
+        for line in cv2.getBuildInformation().splitlines():
+            if line.strip().startswith(keys):
+                print(f"[text_detect] {line.strip()}", file=sys.stderr)
+        print(f"[text_detect] threads={cv2.getNumThreads()} optimized={cv2.useOptimized()}", file=sys.stderr)
+
+
+def cuda_device_count():
+    """Number of CUDA devices usable by OpenCV (0 for builds without CUDA)"""
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount()
+    except (AttributeError, cv2.error):
+        return 0
+
+
+def set_east_backend(net):
+    """
+    Select the dnn backend/target for the EAST net.
+    With EAST_GPU set: CUDA FP16 if a CUDA device is available, else OpenCL FP16;
+    otherwise (or without any GPU) the OpenCV CPU backend.
+    Returns: "cuda", "opencl" or "cpu"
+    """
+    if EAST_GPU and cuda_device_count() > 0:
+        net.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
+        net.setPreferableTarget(cv2.dnn.DNN_TARGET_CUDA_FP16)
+        return "cuda"
+    
+    if EAST_GPU and cv2.ocl.haveOpenCL():
+        cv2.ocl.setUseOpenCL(True)
+        net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        net.setPreferableTarget(cv2.dnn.DNN_TARGET_OPENCL_FP16)
+        return "opencl"
+    
+    net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+    net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+    return "cpu"
+
+
+def get_east_net(model_path):
+    """Load the EAST network once per model path and reuse it across calls"""
+    net = _EAST_NET_CACHE.get(model_path)
+    if net is None:
+        net = cv2.dnn.readNet(model_path)
+        backend = set_east_backend(net)
+        if EAST_GPU:
+            print(f"[text_detect] EAST backend: {backend}", file=sys.stderr)
+        if hasattr(net, "enableWinograd"):
+            net.enableWinograd(True)  # Winograd convolutions (OpenCV >= 4.7)
+        _EAST_NET_CACHE[model_path] = net
+    return net
+
+
+def east_blob(image, new_w, new_h):
+    """
+    Same as cv2.dnn.blobFromImage(image, 1.0, (new_w, new_h), EAST_MEAN, swapRB=True),
+    but resized, split and normalized into buffers reused across calls of the same size.
+    """
+    buffers = _BLOB_CACHE.get((new_h, new_w))
+    if buffers is None:
+        _BLOB_CACHE.clear()
+        buffers = (
+            np.empty((new_h, new_w, 3), dtype=np.uint8),
+            [np.empty((new_h, new_w), dtype=np.uint8) for _ in range(3)],
+            np.empty((1, 3, new_h, new_w), dtype=np.float32)
+        )
+        _BLOB_CACHE[(new_h, new_w)] = buffers
+    resized, planes, blob = buffers
+    
+    if image.shape[:2] != (new_h, new_w):
+        image = cv2.resize(image, (new_w, new_h), dst=resized)
+    
+    # HWC -> contiguous planes, then each plane straight into its NCHW slot
+    cv2.split(image, planes)
+    for c in range(3):
+        # swapRB: blob channel c (RGB) is BGR channel 2 - c
+        cv2.subtract(planes[2 - c], EAST_MEAN[c], dst=blob[0, c], dtype=cv2.CV_32F)
+    
+    return blob
+
+
+def east_input_size(image):
+    """EAST requires dimensions to be multiples of 32: returns (new_w, new_h)"""
+    orig_h, orig_w = image.shape[:2]
+    return (orig_w // 32) * 32, (orig_h // 32) * 32
+
+
+def east_regions(scores, geometry, conf_threshold, ratio_w, ratio_h):
+    """
+    Turn one image's EAST outputs (scores 1x1xHxW, geometry 1x5xHxW) into text regions
+    scaled back to original image coordinates.
+    """
+    # Nothing above threshold (text-free image): skip decode and NMS
+    if not (scores[0, 0] >= conf_threshold).any():
+        return []
+    
+    # Decode predictions
+    xs, ys, ws, hs, confidences = decode_predictions(scores, geometry, conf_threshold)
+    
+    # Apply NMS (boxes are only packed as rows at this boundary)
+    boxes = np.stack([xs, ys, ws, hs], axis=1)
+    indices = np.asarray(cv2.dnn.NMSBoxes(boxes, confidences, conf_threshold, 0.4), dtype=np.intp).reshape(-1)
+    
+    # Scale kept boxes back to the original image size, one attribute array at a time
+    x = (xs[indices] * ratio_w).astype(np.int32).tolist()
+    y = (ys[indices] * ratio_h).astype(np.int32).tolist()
+    w = (ws[indices] * ratio_w).astype(np.int32).tolist()
+    h = (hs[indices] * ratio_h).astype(np.int32).tolist()
+    kept_confidences = confidences[indices].tolist()
+    
+    return [
+        {"x": x[i], "y": y[i], "w": w[i], "h": h[i], "confidence": kept_confidences[i]}
+        for i in range(len(indices))
+    ]
+
+
 def detect_text_east(image, model_path, conf_threshold=0.5):
     """
     Detect text using EAST (Efficient and Accurate Scene Text) detector.
@@ -67,51 +244,59 @@ def detect_text_east(image, model_path, conf_threshold=0.5):
         return None, "EAST model not found"
     
     try:
-        # Load EAST model
-        net = cv2.dnn.readNet(model_path)
+        # Load EAST model (cached)
+        net = get_east_net(model_path)
         
         # Get image dimensions
         orig_h, orig_w = image.shape[:2]
-        
-        # EAST requires dimensions to be multiples of 32
-        new_w = (orig_w // 32) * 32
-        new_h = (orig_h // 32) * 32
+        new_w, new_h = east_input_size(image)
         
         # Resize
         ratio_w = orig_w / float(new_w)
         ratio_h = orig_h / float(new_h)
         
-        blob = cv2.dnn.blobFromImage(
-            image, 1.0, (new_w, new_h),
-            (123.68, 116.78, 103.94), swapRB=True, crop=False
-        )
-        
-        # Define output layers
-        output_layers = [
-            "feature_fusion/Conv_7/Sigmoid",
-            "feature_fusion/concat_3"
-        ]
+        blob = east_blob(image, new_w, new_h)
         
         net.setInput(blob)
-        scores, geometry = net.forward(output_layers)
-        
-        # Decode predictions
-        boxes, confidences = decode_predictions(scores, geometry, conf_threshold)
+        scores, geometry = net.forward(EAST_OUTPUT_LAYERS)
         
-        # Apply NMS
-        indices = cv2.dnn.NMSBoxes(boxes, confidences, conf_threshold, 0.4)
+        return east_regions(scores, geometry, conf_threshold, ratio_w, ratio_h), None
+    except Exception as e:
+        return None, str(e)
+
+
+def detect_text_east_batch(images, model_path, conf_threshold=0.5):
+    """
+    Detect text in several images with batched EAST forward passes
+    (EAST_BATCH_SIZE images per pass, so memory stays bounded for large batches).
+    All images are resized to the input size of the first one (pages of a book
+    share a resolution); boxes are scaled back per image.
+    Returns: (list of region lists, one per image, error)
+    """
+    if not os.path.exists(model_path):
+        return None, "EAST model not found"
+    
+    try:
+        net = get_east_net(model_path)
+        new_w, new_h = east_input_size(images[0])
         
         results = []
-        if len(indices) > 0:
-            for i in indices.flatten():
-                x, y, w, h = boxes[i]
-                results.append({
-                    "x": int(x * ratio_w),
-                    "y": int(y * ratio_h),
-                    "w": int(w * ratio_w),
-                    "h": int(h * ratio_h),
-                    "confidence": float(confidences[i])
-                })
+        for start in range(0, len(images), EAST_BATCH_SIZE):
+            chunk = images[start:start + EAST_BATCH_SIZE]
+            blob = cv2.dnn.blobFromImages(
+                chunk, 1.0, (new_w, new_h),
+                EAST_MEAN, swapRB=True, crop=False
+            )
+            
+            net.setInput(blob)
+            scores, geometry = net.forward(EAST_OUTPUT_LAYERS)
+            
+            for i, image in enumerate(chunk):
+                orig_h, orig_w = image.shape[:2]
+                results.append(east_regions(
+                    scores[i:i + 1], geometry[i:i + 1], conf_threshold,
+                    orig_w / float(new_w), orig_h / float(new_h)
+                ))
         
         return results, None
     except Exception as e:
@@ -119,45 +304,36 @@ def detect_text_east(image, model_path, conf_threshold=0.5):
 
 
 def decode_predictions(scores, geometry, conf_threshold):
-    """Decode EAST model predictions"""
-    num_rows, num_cols = scores.shape[2:4]
-    boxes = []
-    confidences = []
-    
-    for y in range(num_rows):
-        scores_data = scores[0, 0, y]
-        x_data0 = geometry[0, 0, y]
-        x_data1 = geometry[0, 1, y]
-        x_data2 = geometry[0, 2, y]
-        x_data3 = geometry[0, 3, y]
-        angles_data = geometry[0, 4, y]
-        
-        for x in range(num_cols):
-            if scores_data[x] < conf_threshold:
-                continue
-            
-            offset_x = x * 4.0
-            offset_y = y * 4.0
-            
-            angle = angles_data[x]
-            cos = np.cos(angle)
-            sin = np.sin(angle)
-            
-            h = x_data0[x] + x_data2[x]
-            w = x_data1[x] + x_data3[x]
-            
-            end_x = int(offset_x + (cos * x_data1[x]) + (sin * x_data2[x]))
-            end_y = int(offset_y - (sin * x_data1[x]) + (cos * x_data2[x]))
-            start_x = int(end_x - w)
-            start_y = int(end_y - h)
-            
-            boxes.append([start_x, start_y, int(w), int(h)])
-            confidences.append(float(scores_data[x]))
+    """
+    Decode EAST model predictions (vectorized, only over cells above threshold)
+    Returns: structure of arrays (xs, ys, ws, hs int32, confidences float32), one entry per candidate box
+    """
+    scores_data = scores[0, 0]
+    mask = scores_data >= conf_threshold
+    
+    # Each score map cell covers a 4x4 block of the input
+    rows, cols = np.nonzero(mask)
+    offset_x = cols.astype(np.float32) * 4.0
+    offset_y = rows.astype(np.float32) * 4.0
+    
+    x_data0, x_data1, x_data2, x_data3, angles_data = geometry[0][:, mask]
+    cos = np.cos(angles_data)
+    sin = np.sin(angles_data)
+    
+    h = x_data0 + x_data2
+    w = x_data1 + x_data3
+    
+    end_x = (offset_x + (cos * x_data1) + (sin * x_data2)).astype(np.int32)
+    end_y = (offset_y - (sin * x_data1) + (cos * x_data2)).astype(np.int32)
+    xs = (end_x - w).astype(np.int32)
+    ys = (end_y - h).astype(np.int32)
     
-    return boxes, confidences
+    confidences = np.ascontiguousarray(scores_data[mask], dtype=np.float32)
+    
+    return xs, ys, w.astype(np.int32), h.astype(np.int32), confidences
 
 
-def detect_text_fallback(image, min_area=500):
+def detect_text_fallback(image, min_area=500, gray=None):
     """
     Fallback text detection using edge detection and contour analysis.
     Less accurate but works without external models.
@@ -166,97 +342,133 @@ def detect_text_fallback(image, min_area=500):
     - Regions with high edge density (text has lots of edges)
     - Horizontal/rectangular shapes (typical of text blocks)
     - Regions with specific aspect ratios
+    
+    gray: Optional precomputed grayscale image (shared with detect_watermark_signature)
     """
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if gray is None:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    
+    # Coarse region proposals don't need full resolution: Canny/dilate are
+    # memory-bound, so run them on a downsampled copy (~scale^2 fewer bytes)
+    img_h, img_w = gray.shape
+    scale = max(1, max(img_h, img_w) // FALLBACK_MAX_SIZE)
+    if scale > 1:
+        gray = cv2.resize(gray, (img_w // scale, img_h // scale), interpolation=cv2.INTER_AREA)
     
     # Edge detection
     edges = cv2.Canny(gray, 50, 150)
     
-    # Morphological operations to connect text regions
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3))
-    dilated = cv2.dilate(edges, kernel, iterations=2)
+    # Morphological operations to connect text regions. Two iterations of the original
+    # 15x3 rect dilate == one 29x5 rect dilate; scale that final size (rounded up, so
+    # characters still merge into lines) instead of flooring the per-iteration size
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (math.ceil(29 / scale), math.ceil(5 / scale)))
+    dilated = cv2.dilate(edges, kernel)
     
-    # Find contours
-    contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # Bounding boxes of all connected regions in one pass
+    _, _, stats, _ = cv2.connectedComponentsWithStats(dilated, connectivity=8)
+    sx, sy, sw, sh = stats[1:, :4].T  # label 0 is the background
     
-    text_regions = []
-    img_area = image.shape[0] * image.shape[1]
+    # Back to full-resolution coordinates
+    x, y, w, h = sx * scale, sy * scale, sw * scale, sh * scale
+    area = w.astype(np.int64) * h
+    aspect_ratio = w / np.maximum(h, 1)
+    img_area = img_h * img_w
     
-    for contour in contours:
-        x, y, w, h = cv2.boundingRect(contour)
-        area = w * h
-        aspect_ratio = w / h if h > 0 else 0
-        
-        # Filter by size and aspect ratio (text is usually wider than tall)
-        if area < min_area or area > img_area * 0.3:
-            continue
-        if aspect_ratio < 1.5 or aspect_ratio > 20:  # Text blocks are horizontal
-            continue
-        
-        # Check edge density in region
-        region = edges[y:y+h, x:x+w]
-        edge_density = np.sum(region > 0) / (w * h) if w * h > 0 else 0
-        
-        # Text regions typically have moderate edge density
-        if edge_density < 0.1 or edge_density > 0.7:
-            continue
-        
-        text_regions.append({
-            "x": int(x),
-            "y": int(y),
-            "w": int(w),
-            "h": int(h),
-            "confidence": float(edge_density),
-            "method": "fallback"
-        })
+    # Filter by size and aspect ratio (text is usually wider than tall, text blocks are horizontal)
+    keep = (area >= min_area) & (area <= img_area * 0.3) & (aspect_ratio >= 1.5) & (aspect_ratio <= 20)
     
-    return text_regions
+    # Edge density per box (on the downsampled edge map, same ratio) from one integral image
+    # (Canny edges are 0/255, so the integral of edges counts pixels x 255; no mask temporary)
+    ii = cv2.integral(edges)
+    edge_count = (ii[sy + sh, sx + sw] - ii[sy, sx + sw] - ii[sy + sh, sx] + ii[sy, sx]) // 255
+    edge_density = edge_count / np.maximum(sw * sh, 1)
+    
+    # Text regions typically have moderate edge density
+    keep &= (edge_density >= 0.1) & (edge_density <= 0.7)
+    
+    return [
+        {
+            "x": int(x[i]),
+            "y": int(y[i]),
+            "w": int(w[i]),
+            "h": int(h[i]),
+            "confidence": float(edge_density[i]),
+            "method": "fallback"
+        }
+        for i in np.flatnonzero(keep)
+    ]
+
+
+def get_pytesseract():
+    """Import pytesseract on first use; returns the module, or None if unavailable"""
+    global pytesseract, PYTESSERACT_AVAILABLE
+    if pytesseract is None and PYTESSERACT_AVAILABLE:
+        try:
+            import pytesseract as pytesseract_module
+            pytesseract = pytesseract_module
+        except ImportError:
+            PYTESSERACT_AVAILABLE = False
+    return pytesseract
+
+
+def ocr_region(roi):
+    """OCR a single-line region; returns stripped text, or None on failure"""
+    try:
+        return pytesseract.image_to_string(roi, config="--psm 7").strip()
+    except Exception:
+        return None
 
 
 def verify_text_with_ocr(image, regions):
     """
     Use pytesseract to verify if regions actually contain text.
     Returns filtered regions that likely contain real text.
+    Regions are OCR'd in parallel threads (tesseract runs outside the GIL).
     """
-    if not PYTESSERACT_AVAILABLE or not regions:
+    if not regions or get_pytesseract() is None:
         return regions
     
-    verified = []
-    
+    # Extract regions up front
+    crops = []
     for region in regions:
         x, y, w, h = region["x"], region["y"], region["w"], region["h"]
-        
-        # Extract region
         roi = image[y:y+h, x:x+w]
-        if roi.size == 0:
-            continue
-        
-        # Run OCR
-        try:
-            text = pytesseract.image_to_string(roi, config="--psm 7").strip()
-            if len(text) >= 2:  # At least 2 characters
-                region["ocr_text"] = text[:50]  # Truncate
-                region["verified"] = True
-                verified.append(region)
-        except Exception:
-            pass
+        if roi.size > 0:
+            crops.append((region, roi))
+    
+    if not crops:
+        return []
+    
+    # Run OCR
+    with ThreadPoolExecutor(max_workers=min(OCR_MAX_WORKERS, len(crops))) as pool:
+        texts = list(pool.map(ocr_region, [roi for _, roi in crops]))
+    
+    verified = []
+    for (region, _), text in zip(crops, texts):
+        if text is not None and len(text) >= 2:  # At least 2 characters
+            region["ocr_text"] = text[:50]  # Truncate
+            region["verified"] = True
+            verified.append(region)
     
     return verified
 
 
-def detect_watermark_signature(image):
+def detect_watermark_signature(image, gray=None):
     """
     Detect potential watermarks or signatures in corners.
     These are often placed in bottom-right corner.
+    gray: Optional precomputed grayscale image (shared with detect_text_fallback)
     """
-    h, w = image.shape[:2]
+    if gray is None:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape[:2]
     
-    # Define corner regions to check
+    # Define corner regions to check (views into the shared grayscale image)
     corners = {
-        "bottom_right": image[int(h*0.8):h, int(w*0.7):w],
-        "bottom_left": image[int(h*0.8):h, 0:int(w*0.3)],
-        "top_right": image[0:int(h*0.15), int(w*0.7):w],
-        "top_left": image[0:int(h*0.15), 0:int(w*0.3)]
+        "bottom_right": gray[int(h*0.8):h, int(w*0.7):w],
+        "bottom_left": gray[int(h*0.8):h, 0:int(w*0.3)],
+        "top_right": gray[0:int(h*0.15), int(w*0.7):w],
+        "top_left": gray[0:int(h*0.15), 0:int(w*0.3)]
     }
     
     suspicious_corners = []
@@ -266,9 +478,8 @@ def detect_watermark_signature(image):
             continue
         
         # Check for text-like patterns in corner
-        gray = cv2.cvtColor(corner_img, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 50, 150)
-        edge_density = np.sum(edges > 0) / edges.size if edges.size > 0 else 0
+        edges = cv2.Canny(corner_img, 50, 150)
+        edge_density = cv2.countNonZero(edges) / edges.size if edges.size > 0 else 0
         
         # Corners with text (watermarks/signatures) have higher edge density
         if edge_density > 0.15:
@@ -280,72 +491,41 @@ def detect_watermark_signature(image):
     return suspicious_corners
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Text detection in images')
-    parser.add_argument('--image', type=str, required=True, help='Path to image')
-    parser.add_argument('--east-model', type=str, default=EAST_MODEL_PATH, help='Path to EAST model')
-    parser.add_argument('--threshold', type=float, default=0.5, help='Confidence threshold')
-    parser.add_argument('--verify-ocr', action='store_true', help='Use OCR to verify detections')
-    
-    args = parser.parse_args()
-    
-    if not DEPENDENCIES_AVAILABLE:
-        result = {
-            "ok": False,
-            "error": "DEPENDENCIES_MISSING",
-            "message": f"Required packages not installed: {IMPORT_ERROR}"
-        }
-        print(json.dumps(result, ensure_ascii=False))
-        sys.exit(1)
-    
-    if not os.path.exists(args.image):
-        result = {
-            "ok": False,
-            "error": "IMAGE_NOT_FOUND",
-            "message": f"Image not found: {args.image}"
-        }
-        print(json.dumps(result, ensure_ascii=False))
-        sys.exit(1)
-    
-    # Load image
-    image = cv2.imread(args.image)
-    if image is None:
-        result = {
-            "ok": False,
-            "error": "IMAGE_READ_FAILED",
-            "message": f"Could not read image: {args.image}"
-        }
-        print(json.dumps(result, ensure_ascii=False))
-        sys.exit(1)
-    
+def analyze_image(image, east_text_regions=None, verify_ocr=False):
+    """
+    Full text/watermark check for one image.
+    east_text_regions: EAST result for the image (None if EAST is unavailable or failed)
+    Returns: result dict as printed by main
+    """
     text_regions = []
     detection_method = "none"
     
+    # Grayscale conversion shared by the fallback detector and the corner check
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    
     # Try EAST detector first
-    if args.east_model and os.path.exists(args.east_model):
-        regions, error = detect_text_east(image, args.east_model, args.threshold)
-        if regions is not None:
-            text_regions = regions
-            detection_method = "east"
+    if east_text_regions is not None:
+        text_regions = east_text_regions
+        detection_method = "east"
     
     # Fallback to edge-based detection
     if not text_regions:
-        text_regions = detect_text_fallback(image)
+        text_regions = detect_text_fallback(image, gray=gray)
         detection_method = "fallback"
     
     # Optionally verify with OCR
-    if args.verify_ocr and PYTESSERACT_AVAILABLE:
+    if verify_ocr and get_pytesseract() is not None:
         text_regions = verify_text_with_ocr(image, text_regions)
         detection_method += "+ocr"
     
     # Check for watermarks/signatures in corners
-    suspicious_corners = detect_watermark_signature(image)
+    suspicious_corners = detect_watermark_signature(image, gray=gray)
     
     # Determine if text was detected
     has_text = len(text_regions) > 0
     has_watermark = len(suspicious_corners) > 0
     
-    result = {
+    return {
         "ok": True,
         "text_detected": has_text,
         "watermark_suspected": has_watermark,
@@ -354,9 +534,181 @@ def main():
         "detection_method": detection_method,
         "pytesseract_available": PYTESSERACT_AVAILABLE
     }
+
+
+def load_image(image_path):
+    """Read an image; returns (image, error_result)"""
+    if not os.path.exists(image_path):
+        return None, {
+            "ok": False,
+            "error": "IMAGE_NOT_FOUND",
+            "message": f"Image not found: {image_path}"
+        }
+    
+    image = cv2.imread(image_path)
+    if image is None:
+        return None, {
+            "ok": False,
+            "error": "IMAGE_READ_FAILED",
+            "message": f"Could not read image: {image_path}"
+        }
+    
+    return image, None
+
+
+def run_batch(image_paths, east_model, threshold, verify_ocr):
+    """
+    Check several images in one process, EAST_BATCH_SIZE at a time: each chunk is
+    decoded, run through one EAST forward pass and analyzed before the next is loaded.
+    Returns: list of per-image result dicts (each with "image" set to its path)
+    """
+    results = []
+    for start in range(0, len(image_paths), EAST_BATCH_SIZE):
+        chunk_paths = image_paths[start:start + EAST_BATCH_SIZE]
+        loaded = [load_image(path) for path in chunk_paths]
+        images = [image for image, _ in loaded if image is not None]
+        
+        east_results = [None] * len(images)
+        if images and east_model and os.path.exists(east_model):
+            regions, error = detect_text_east_batch(images, east_model, threshold)
+            if regions is not None:
+                east_results = regions
+        
+        east_iter = iter(east_results)
+        for path, (image, error_result) in zip(chunk_paths, loaded):
+            result = error_result if image is None else analyze_image(image, next(east_iter), verify_ocr)
+            result["image"] = path
+            results.append(result)
+    
+    return results
+
+
+def check_image(image_path, east_model, threshold, verify_ocr):
+    """
+    Load one image and run the full check (EAST if the model exists, else fallback).
+    Returns: result dict (error result if the image can't be read)
+    """
+    image, error_result = load_image(image_path)
+    if image is None:
+        return error_result
+    
+    east_text_regions = None
+    if east_model and os.path.exists(east_model):
+        east_text_regions, error = detect_text_east(image, east_model, threshold)
+    
+    return analyze_image(image, east_text_regions, verify_ocr)
+
+
+def _dumps(obj):
+    """Serialize a result to a JSON string (orjson when installed, which also accepts NumPy values)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def write_line(result):
+    sys.stdout.write(_dumps(result) + "\n")
+    sys.stdout.flush()
+
+
+def exit_fast(code):
+    """
+    Exit right after flushing stdio, skipping interpreter teardown (module
+    finalizers, cv2/numpy destructors) that only adds latency to a one-shot run.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)
+
+
+def serve(east_model, threshold, verify_ocr):
+    """
+    Server mode: one job per stdin line, one JSON result line per job on stdout.
+    A job is either an image path or {"image": "...", "verify_ocr": bool, "id": ...}
+    (the id is echoed back). The EAST net and blob buffers stay warm across jobs.
+    """
+    if east_model and os.path.exists(east_model):
+        try:
+            get_east_net(east_model)
+        except cv2.error as e:
+            print(f"Warning: Failed to load EAST model, using fallback: {e}", file=sys.stderr)
+            east_model = None
+    
+    write_line({"ok": True, "ready": True})
+    
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break  # stdin closed, caller is done
+        line = line.strip()
+        if not line:
+            continue
+        
+        job = {"image": line}
+        if line.startswith("{"):
+            try:
+                job = json.loads(line)
+            except ValueError as e:
+                write_line({"ok": False, "error": "INVALID_JOB", "message": str(e)})
+                continue
+            if not isinstance(job, dict) or not job.get("image"):
+                result = {"ok": False, "error": "INVALID_JOB", "message": "Job must be a JSON object with image"}
+                if isinstance(job, dict) and "id" in job:
+                    result["id"] = job["id"]
+                write_line(result)
+                continue
+        
+        try:
+            result = check_image(job["image"], east_model, threshold, job.get("verify_ocr", verify_ocr))
+        except Exception as e:
+            result = {"ok": False, "error": "JOB_FAILED", "message": str(e)}
+        result["image"] = job["image"]
+        if "id" in job:
+            result["id"] = job["id"]
+        write_line(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Text detection in images')
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument('--image', type=str, help='Path to image')
+    inputs.add_argument('--images', type=str, nargs='+', help='Paths to several images (one batched EAST pass)')
+    inputs.add_argument('--server', action='store_true', help='Serve image paths / JSON jobs from stdin, one JSON line per job')
+    parser.add_argument('--east-model', type=str, default=EAST_MODEL_PATH, help='Path to EAST model')
+    parser.add_argument('--threshold', type=float, default=0.5, help='Confidence threshold')
+    parser.add_argument('--verify-ocr', action='store_true', help='Use OCR to verify detections')
+    parser.add_argument('--verbose', action='store_true', help='Print OpenCV SIMD/thread configuration to stderr')
+    
+    args = parser.parse_args()
+    
+    if not DEPENDENCIES_AVAILABLE:
+        result = {
+            "ok": False,
+            "error": "DEPENDENCIES_MISSING",
+            "message": f"Required packages not installed: {IMPORT_ERROR}"
+        }
+        write_line(result)
+        exit_fast(1)
+    
+    configure_opencv(verbose=args.verbose)
+    
+    if args.images:
+        results = run_batch(args.images, args.east_model, args.threshold, args.verify_ocr)
+        result = {
+            "ok": all(r["ok"] for r in results),
+            "results": results
+        }
+        write_line(result)
+        exit_fast(0 if result["ok"] else 1)
+    
+    if args.server:
+        serve(args.east_model, args.threshold, args.verify_ocr)
+        exit_fast(0)
+    
+    result = check_image(args.image, args.east_model, args.threshold, args.verify_ocr)
     
-    print(json.dumps(result, ensure_ascii=False))
-    sys.exit(0)
+    write_line(result)
+    exit_fast(0 if result["ok"] else 1)
 
 
 if __name__ == "__main__":